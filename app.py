@@ -1,99 +1,122 @@
 import streamlit as st
-import requests
-from io import BytesIO
-from openai import OpenAI
-from datetime import datetime
 from streamlit_mic_recorder import mic_recorder
-from pydub import AudioSegment
-import pytz
+import time
 import warnings
+from core.options import OPTIONS as options
+from core.page import APP_BUTTON_CSS, setup_page
+from core.prompt_engine import template_prompt
+from core.debug_panel import debug_enabled, show_debug_panel
+from core.gallery_view import show_gallery
+from core.resources import (
+    get_audio_ingest,
+    get_blob_store,
+    get_gallery,
+    get_image_cache,
+    get_job_queue,
+    get_metrics_exporters,
+    get_previews,
+    get_rate_limiter,
+    setting,
+)
+from core.services import generate_image_ref, record_generation
+from core.voice_pipeline import voice_to_image
+from core.jobs import DONE, POLL_SECONDS
+from core.tracing import observe
+from core.variants import MAX_VARIANTS, VARY_CHOICES, plan_variants, variants_job, zip_images
 
 # =========================
 # 불필요한 경고 숨기기
 # =========================
 warnings.filterwarnings("ignore", category=UserWarning)
+run_started = time.perf_counter()
 
 # =========================
-# 기본 환경 설정
-# =========================
-korea = pytz.timezone("Asia/Seoul")
-now = datetime.now(korea)
-cutoff_datetime = korea.localize(datetime(2026, 2, 5, 17, 15, 59))
-
-if now > cutoff_datetime:
-    st.error("⛔ 앱 사용시간이 종료되었습니다! 감사합니다💕")
-    st.stop()
-
-st.set_page_config(page_title="나의 그림상자 (Drawing Assistant)", layout="wide")
-st.title("🖼️ 나의 그림상자 - **My AI Drawing-Box**")
-
-# =========================
-# 🎨 버튼 스타일
-# =========================
-st.markdown("""
-<style>
-div.stButton > button:first-child,
-div.stDownloadButton > button:first-child {
-    background-color: #A8E6CF !important;
-    color: #004D40 !important;
-    font-weight: 900 !important;
-    font-size: 1.05rem !important;
-    border: none !important;
-    border-radius: 10px !important;
-    padding: 0.6em 1.2em !important;
-    transition: all 0.25s ease-in-out !important;
-    box-shadow: 0px 3px 8px rgba(0,0,0,0.08);
-}
-div.stButton > button:hover,
-div.stDownloadButton > button:hover {
-    background-color: #C8F7E6 !important;
-    color: #002C25 !important;
-    transform: scale(1.03);
-}
-</style>
-""", unsafe_allow_html=True)
-
-# =========================
-# OpenAI 클라이언트
-# =========================
-client = OpenAI(api_key=st.secrets["api_key"])
-
-# =========================
-# 옵션 리스트 (전체 복원)
-# =========================
-options = {
-    "style": [
-        "스티커 스타일", "이모지 스타일", "수채화 스타일", "유화 스타일", "모네풍(인상파)",
-        "사진 스타일", "손그림(드로잉)", "크레용 스타일", "낙서(Doodle)", "팝아트 스타일",
-        "빈티지 포스터", "신문지 콜라주", "종이 질감 스타일", "색종이 오려붙이기", "패턴 배경 스타일",
-        "혼합 매체", "사진+일러스트 혼합", "디지털 콜라주", "포토몽타주", "데콜라주"
-    ],
-    "tone": [
-        "따뜻한 파스텔톤", "선명한 원색", "몽환적 퍼플", "차가운 블루", "빈티지 세피아",
-        "형광 네온", "모노톤 (흑백)", "대비 강한 컬러", "브라운 계열", "연보라+회색",
-        "다채로운 무지개", "연한 베이지", "청록+골드"
-    ],
-    "mood": [
-        "몽환적", "고요함", "희망", "슬픔", "그리움", "설렘", "불안정함", "자유로움",
-        "기대감", "공허함", "감사함", "외로움", "기쁨", "어두움", "차분함",
-        "위로", "용기", "무한함", "즐거움", "강렬함"
-    ],
-    "viewpoint": [
-        "정면", "항공 시점", "클로즈업", "광각", "역광",
-        "뒷모습", "소프트 포커스", "하늘을 올려다보는 시점"
-    ],
-    "image_size": ["1024x1024", "1024x1792 (세로형)", "1792x1024 (가로형)"]
-}
+# 기본 환경 설정 (사용 기한 확인 + 페이지 설정 + 🎨 버튼 스타일)
+# =========================
+setup_page("🖼️ 나의 그림상자 - **My AI Drawing-Box**", cutoff="2026-02-05 17:15:59", css=APP_BUTTON_CSS)
+
+# =========================
+# 공용 자원 (프로세스에 한 번만 만들어 모든 세션이 공유)
+# =========================
+jobs = get_job_queue()
+previews = get_previews()
+get_metrics_exporters()
+
+# 화면 미리보기 크기: "small" / "medium" / "large"
+PREVIEW_SIZE = setting("preview_size", "medium")
+# 여러 장 생성: 한 작업 안에서 동시에 보내는 이미지 요청 수, 격자 열 수
+VARIANT_CONCURRENCY = int(setting("variant_concurrency", 4))
+GRID_COLUMNS = 2
+
+def voice_prompt(recognized_text):
+    return f"Create a digital artwork about '{recognized_text}' with dreamy pastel tones."
+
+def manual_prompt(theme):
+    return lambda selection: template_prompt(theme, selection)
+
+def image_job(job, prompt, size, theme, selection):
+    # 작업 스레드에서 실행 → st.* 호출 금지, 결과(이미지 참조)는 화면 쪽 폴링이 세션에 옮김
+    job.detail["prompt"] = prompt
+    image_ref = generate_image_ref(prompt, size, report=job.report)
+    record_generation(image_ref, prompt, theme=theme, app="app", size=size, **selection)
+    return image_ref
+
+def voice_job(job, ingest, audio_bytes):
+    image_ref = voice_to_image(job, ingest, audio_bytes, voice_prompt, generate_image_ref, "1024x1024")
+    record_generation(image_ref, job.detail["prompt"], theme=job.detail["text"], app="app", size="1024x1024")
+    return image_ref
+
+def start_image_job(prompt, size, theme, selection):
+    st.session_state["image_job"] = jobs.submit(image_job, prompt, size, theme, selection, label=prompt)
+
+def start_voice_job(audio_bytes):
+    # 음성 인식 → 프롬프트 → 이미지 생성을 한 작업으로 이어서 실행 (단계별 진행 상황은 job.detail)
+    # 음성 인식기는 처음 녹음했을 때 만들어짐 (녹음하지 않으면 첫 실행이 가벼움)
+    st.session_state["image_job"] = jobs.submit(voice_job, get_audio_ingest(), audio_bytes, label="voice")
+
+def start_variants_job(plan, size, theme):
+    # 여러 장을 한 작업으로 동시에 생성 → 끝나는 칸부터 격자에 표시
+    def record(item, image_ref):
+        record_generation(image_ref, item["prompt"], theme=theme, app="app", size=size, **item["selection"])
+
+    st.session_state["variant_plan"] = plan
+    st.session_state["variant_cells"] = []
+    st.session_state["variants_job"] = jobs.submit(
+        variants_job, plan, size, generate_image_ref,
+        max_concurrency=VARIANT_CONCURRENCY, record=record, label=f"variants x{len(plan)}"
+    )
+
+def variant_grid(plan, cells):
+    # 끝난 칸은 작은 미리보기, 아직인 칸은 대기 표시
+    cols = st.columns(GRID_COLUMNS)
+    for index, item in enumerate(plan):
+        cell = cells[index] if index < len(cells) else None
+        with cols[index % GRID_COLUMNS]:
+            if cell is None:
+                st.info(f"⏳ {item['label']}")
+            elif "error" in cell:
+                st.error(f"❌ {item['label']}: {cell['error']}")
+            else:
+                st.image(previews.get(cell["ref"], "small"), caption=item["label"], use_container_width=True)
 
 # =========================
 # 세션 상태 초기화
 # =========================
 if "theme" not in st.session_state:
     st.session_state["theme"] = ""
-if "image_bytes" not in st.session_state:
-    st.session_state["image_bytes"] = None
+if "image_ref" not in st.session_state:
+    st.session_state["image_ref"] = None
 if "dalle_prompt" not in st.session_state:
     st.session_state["dalle_prompt"] = ""
+if "image_job" not in st.session_state:
+    st.session_state["image_job"] = None
+if "variants_job" not in st.session_state:
+    st.session_state["variants_job"] = None
+if "variant_cells" not in st.session_state:
+    st.session_state["variant_cells"] = []
+# 음성으로 인식된 주제는 주제 입력칸이 만들어지기 전에 반영
+if "recognized_theme" in st.session_state:
+    st.session_state["theme"] = st.session_state.pop("recognized_theme")
 
 # =========================
 # 좌우 컬럼 레이아웃
@@ -113,39 +136,9 @@ with left:
         key="voice_input"
     )
 
-    # 🎧 Whisper 인식
+    # 🎧 음성 인식 + 🎨 자동 이미지 생성 (백그라운드 작업, 인식된 글자는 오른쪽에 바로바로 표시)
     if audio_data and "bytes" in audio_data:
-        try:
-            audio_bytes = audio_data["bytes"]
-            webm_audio = AudioSegment.from_file(BytesIO(audio_bytes), format="webm", codec="opus")
-            wav_buffer = BytesIO()
-            webm_audio.export(wav_buffer, format="wav")
-            wav_buffer.seek(0)
-
-            transcript = client.audio.transcriptions.create(
-                model="gpt-4o-mini-transcribe",
-                file=("recorded.wav", wav_buffer, "audio/wav")
-            )
-            recognized_text = transcript.text.strip()
-            st.session_state["theme"] = recognized_text
-            st.success(f"🎙️ 인식된 주제: {recognized_text}")
-
-            # 🎨 자동 이미지 생성
-            with st.spinner("이미지 자동 생성 중..."):
-                dalle_prompt = f"Create a digital artwork about '{recognized_text}' with dreamy pastel tones."
-                image_response = client.images.generate(
-                    model="dall-e-3",
-                    prompt=dalle_prompt,
-                    size="1024x1024"
-                )
-                img_url = image_response.data[0].url
-                img_bytes = requests.get(img_url).content
-                st.session_state["image_bytes"] = img_bytes
-                st.session_state["dalle_prompt"] = dalle_prompt
-                st.success("✅ 음성으로 자동 이미지 생성 완료!")
-
-        except Exception as e:
-            st.error(f"❌ Whisper 인식 실패: {e}")
+        start_voice_job(audio_data["bytes"])
 
     # 🎯 주제 입력칸
     theme = st.text_input("🎯 주제", placeholder="예: 꿈속을 걷는 느낌", key="theme")
@@ -156,36 +149,124 @@ with left:
     mood = st.multiselect("💫 감정 / 분위기", options["mood"], default=["몽환적"])
     viewpoint = st.selectbox("📷 시점 / 구도", options["viewpoint"])
     size = st.selectbox("🖼️ 이미지 크기", options["image_size"])
+    count = st.slider("🖼️ 한 번에 만들 장 수", 1, MAX_VARIANTS, 1)
+    vary = st.radio("변화 주기", list(VARY_CHOICES), format_func=VARY_CHOICES.get, horizontal=True) if count > 1 else "none"
 
     # 수동 생성 버튼
     if st.button("✨ 수동으로 이미지 생성하기"):
-        with st.spinner("이미지 생성 중..."):
-            try:
-                prompt = f"A {tone} {style} artwork expressing {', '.join(mood)} mood, viewed from {viewpoint}, themed '{theme}'."
-                img_res = client.images.generate(model="dall-e-3", prompt=prompt, size=size.split(" ")[0])
-                img_url = img_res.data[0].url
-                img_bytes = requests.get(img_url).content
-                st.session_state["image_bytes"] = img_bytes
-                st.session_state["dalle_prompt"] = prompt
-                st.success("✅ 이미지 생성 완료!")
-            except Exception as e:
-                st.error(f"❌ 에러: {e}")
+        selection = {"style": style, "tone": tone, "mood": mood, "viewpoint": viewpoint}
+        if count > 1:
+            start_variants_job(plan_variants(selection, count, vary, manual_prompt(theme)), size.split(" ")[0], theme)
+        else:
+            start_image_job(manual_prompt(theme)(selection), size.split(" ")[0], theme, selection)
+
+# =========================
+# 백그라운드 작업 상태 확인 (이 부분만 POLL_SECONDS마다 다시 실행)
+# =========================
+@st.fragment(run_every=POLL_SECONDS)
+def show_image_job():
+    job = jobs.get(st.session_state.get("image_job"))
+    if job is None:
+        st.session_state["image_job"] = None
+        return
+    if job.active:
+        if job.detail.get("text"):
+            st.info(f"🎙️ 인식된 주제: {job.detail['text']}")
+        st.progress(job.progress, text=f"⏳ {job.message}")
+        return
+
+    # 끝난 작업 → 결과를 세션에 옮기고 전체 화면 다시 그리기
+    st.session_state["image_job"] = None
+    if job.detail.get("text"):
+        st.session_state["recognized_theme"] = job.detail["text"]
+    if job.status == DONE:
+        st.session_state["image_ref"] = job.result
+        st.session_state["dalle_prompt"] = job.detail.get("prompt", "")
+        timings = job.detail.get("timings", {})
+        if "total" in timings:
+            st.session_state["image_notice"] = (
+                f"✅ 음성으로 자동 이미지 생성 완료! "
+                f"(인식 {timings['transcribe']:.1f}초 · 이미지 {timings['image']:.1f}초)"
+            )
+        else:
+            st.session_state["image_notice"] = "✅ 이미지 생성 완료!"
+    else:
+        st.session_state["image_error"] = f"❌ 에러: {job.error}"
+    st.rerun()
+
+@st.fragment(run_every=POLL_SECONDS)
+def show_variants_job():
+    job = jobs.get(st.session_state.get("variants_job"))
+    if job is None:
+        st.session_state["variants_job"] = None
+        return
+    if job.active:
+        st.progress(job.progress, text=f"⏳ {job.message}")
+        variant_grid(st.session_state["variant_plan"], job.detail.get("cells") or [])
+        return
+
+    st.session_state["variants_job"] = None
+    if job.status == DONE:
+        st.session_state["variant_cells"] = job.result
+        st.session_state["image_notice"] = "✅ 여러 장 생성 완료!"
+    else:
+        st.session_state["variant_cells"] = job.detail.get("cells") or []
+        st.session_state["image_error"] = f"❌ 에러: {job.error}"
+    st.rerun()
 
 # =========================
 # 오른쪽: 이미지 표시
 # =========================
 with right:
-    if st.session_state.get("image_bytes"):
-        st.image(st.session_state["image_bytes"], caption="🎨 생성된 이미지", use_container_width=True)
+    if st.session_state.get("image_job"):
+        show_image_job()
+    if st.session_state.get("variants_job"):
+        show_variants_job()
+    if st.session_state.get("image_notice"):
+        st.success(st.session_state.pop("image_notice"))
+    if st.session_state.get("image_error"):
+        st.error(st.session_state.pop("image_error"))
+    image_ref = st.session_state.get("image_ref")
+    preview = previews.get(image_ref, PREVIEW_SIZE) if image_ref else None
+    if preview:
+        st.image(preview, caption="🎨 생성된 이미지", use_container_width=True)
         st.download_button(
             label="📥 이미지 다운로드",
-            data=st.session_state["image_bytes"],
+            data=previews.original(image_ref),
             file_name="my_art_box.png",
             mime="image/png"
         )
         st.markdown(f"📝 **프롬프트:** {st.session_state['dalle_prompt']}")
 
+    # 여러 장 결과: 격자 + 전체 ZIP 다운로드 (ZIP은 버튼을 누를 때 만듦)
+    variant_cells = st.session_state.get("variant_cells")
+    if variant_cells and not st.session_state.get("variants_job"):
+        variant_grid(st.session_state["variant_plan"], variant_cells)
+        variant_refs = [cell["ref"] for cell in variant_cells if cell and "ref" in cell]
+        if variant_refs:
+            st.download_button(
+                label=f"📦 전체 다운로드 ({len(variant_refs)}장, ZIP)",
+                data=lambda: zip_images(get_blob_store(), variant_refs),
+                file_name="my_art_box.zip",
+                mime="application/zip",
+                key="download_variants"
+            )
 
+# =========================
+# 지난 작품 모아보기 (켰을 때만 불러옴)
+# =========================
+if st.toggle("🗂️ 지난 작품 모아보기", key="show_gallery"):
+    show_gallery(get_gallery(), previews, options)
 
-
-
+# =========================
+# 디버그 패널 (켰을 때만) + 이번 실행 시간 기록
+# =========================
+if debug_enabled(setting):
+    with st.sidebar:
+        show_debug_panel({
+            "jobs": jobs.stats,
+            "rate_limiter": get_rate_limiter().stats,
+            "image_cache": get_image_cache().stats,
+            "blob_store": get_blob_store().stats,
+        })
+observe("script.run", time.perf_counter() - run_started)
@@ -1,130 +1,88 @@
 import streamlit as st
-import requests
-from io import BytesIO
-from openai import OpenAI
-from datetime import datetime
-import pytz
+import time
+from core.options import get_options, translate_to_prompt, size_param as to_size_param
+from core.page import APP2_BUTTON_CSS, setup_page
+from core.prompt_engine import build_prompt
+from core.debug_panel import debug_enabled, show_debug_panel
+from core.gallery_view import show_gallery
+from core.resources import (
+    get_blob_store,
+    get_gallery,
+    get_image_cache,
+    get_job_queue,
+    get_metrics_exporters,
+    get_previews,
+    get_rate_limiter,
+    get_suggestion_cache,
+    setting,
+)
+from core.services import chat, chat_stream, generate_image, generate_image_ref, record_generation
+from core.jobs import DONE, POLL_SECONDS
+from core.tracing import observe, span
+from core.variants import MAX_VARIANTS, VARY_CHOICES, plan_variants, variants_job, zip_images
 
 # =========================
-# 기본 환경 설정
+# 기본 환경 설정 (사용 기한 확인 + 페이지 설정 + 🎨 버튼 스타일)
 # =========================
-korea = pytz.timezone("Asia/Seoul")
-now = datetime.now(korea)
-cutoff_datetime = korea.localize(datetime(2026, 1, 21, 19, 59, 59))
+run_started = time.perf_counter()
+setup_page("🖼️ 나의 그림상자 - My AI Drawing-Box", cutoff="2026-01-21 19:59:59", css=APP2_BUTTON_CSS)
 
-if now > cutoff_datetime:
-    st.error("⛔ 앱 사용시간이 종료되었습니다! 감사합니다💕")
-    st.stop()
+# 공용 자원 (프로세스에 한 번만 만들어 모든 세션이 공유)
+jobs = get_job_queue()
+blobs = get_blob_store()
+previews = get_previews()
+get_metrics_exporters()
 
-st.set_page_config(page_title="나의 그림상자 (Drawing Assistant)", layout="wide")
-st.title("🖼️ 나의 그림상자 - My AI Drawing-Box")
+# 화면 미리보기 크기: "small" / "medium" / "large"
+PREVIEW_SIZE = setting("preview_size", "medium")
+# 프롬프트 생성 방식: "structured"(추천+프롬프트 한 번에) / "two_step"(기존 두 번 호출)
+PROMPT_MODE = setting("prompt_mode", "structured")
+# 추천 의미 캐시는 추천을 따로 받는 two_step에서만 씀 (structured는 추천과 프롬프트를 한 번에 받아 재사용할 게 없음)
+suggestions = get_suggestion_cache() if PROMPT_MODE == "two_step" else None
+# 프롬프트를 토큰 단위로 오른쪽에 바로바로 표시할지 여부
+STREAM_PROMPT = setting("stream_prompt", True)
+# 여러 장 생성: 한 작업 안에서 동시에 보내는 이미지 요청 수, 격자 열 수
+VARIANT_CONCURRENCY = int(setting("variant_concurrency", 4))
+GRID_COLUMNS = 2
 
-# 🎨 버튼 색상 스타일 (연한 민트 + 굵은 글씨)
-st.markdown("""
-<style>
-div.stButton > button:first-child,
-div.stDownloadButton > button:first-child,
-div.stFormSubmitButton > button:first-child {
-    background-color: #A8E6CF !important;   /* 연한 민트 */
-    color: #004D40 !important;              /* 진한 청록 글자색 */
-    font-family: "Noto Sans KR", "Pretendard", sans-serif !important;
-    font-weight: 900 !important;            /* 아주 굵게 */
-    font-size: 1.05rem !important;          /* 살짝 크게 */
-    border: none !important;
-    border-radius: 10px !important;
-    padding: 0.6em 1.2em !important;
-    transition: all 0.25s ease-in-out !important;
-    box-shadow: 0px 3px 8px rgba(0,0,0,0.08);
-}
-div.stButton > button:hover,
-div.stDownloadButton > button:hover,
-div.stFormSubmitButton > button:hover {
-    background-color: #C8F7E6 !important;   /* hover 시 더 밝은 민트 */
-    color: #002C25 !important;
-    transform: scale(1.03);
-}
-</style>
-""", unsafe_allow_html=True)
+def image_job(job, prompt, size_param, meta):
+    # 작업 스레드에서 실행 → st.* 호출 금지, 결과는 화면 쪽 폴링이 세션에 옮김
+    image_bytes, image_url = generate_image(prompt, size_param, report=job.report)
+    image_ref = blobs.put(image_bytes)
+    record_generation(image_ref, prompt, app="app2", size=size_param, data=image_bytes, **meta)
+    return image_ref, image_url, size_param
 
-# OpenAI 클라이언트
-client = OpenAI(api_key=st.secrets["api_key"])
+def generation_meta():
+    # 갤러리에 함께 기록할 주제/시각 요소 (마지막으로 만든 프롬프트 기준)
+    meta = {key: st.session_state.get(key) for key in ("style", "tone", "mood", "viewpoint")}
+    meta["theme"] = st.session_state.get("theme", "")
+    return meta
 
-# =========================
-# 옵션 & 번역
-# =========================
-def get_options():
-    return {
-        "style": [
-            "스티커 스타일", "이모지 스타일", "수채화 스타일", "유화 스타일", "모네풍(인상파)",
-            "사진 스타일", "손그림(드로잉)", "크레용 스타일", "낙서(Doodle)", "팝아트 스타일",
-            "빈티지 포스터", "신문지 콜라주", "종이 질감 스타일", "색종이 오려붙이기", "패턴 배경 스타일",
-            "혼합 매체", "사진+일러스트 혼합", "디지털 콜라주", "포토몽타주", "데콜라주"
-        ],
-        "tone": [
-            "따뜻한 파스텔톤", "선명한 원색", "몽환적 퍼플", "차가운 블루", "빈티지 세피아",
-            "형광 네온", "모노톤 (흑백)", "대비 강한 컬러", "브라운 계열", "연보라+회색",
-            "다채로운 무지개", "연한 베이지", "청록+골드"
-        ],
-        "mood": [
-            "몽환적", "고요함", "희망", "슬픔", "그리움", "설렘", "불안정함", "자유로움",
-            "기대감", "공허함", "감사함", "외로움", "기쁨", "어두움", "차분함",
-            "위로", "용기", "무한함", "즐거움", "강렬함"
-        ],
-        "viewpoint": [
-            "정면", "항공 시점", "클로즈업", "광각", "역광",
-            "뒷모습", "소프트 포커스", "하늘을 올려다보는 시점"
-        ],
-        # DALL·E 3 공식 지원 해상도
-        "image_size": ["1024x1024", "1024x1792 (세로형)", "1792x1024 (가로형)"]
-    }
+def variant_recorder(theme, size_param):
+    # 여러 장 생성에서 한 장 끝날 때마다 갤러리에 기록 (장마다 바뀐 시각 요소 포함)
+    def record(item, image_ref):
+        record_generation(image_ref, item["prompt"], theme=theme, app="app2", size=size_param, **item["selection"])
+    return record
 
-def translate_to_prompt(style, tone, mood, viewpoint):
-    style_dict = {
-        "스티커 스타일": "sticker style",
-        "이모지 스타일": "emoji style",
-        "수채화 스타일": "watercolor style",
-        "유화 스타일": "oil painting style",
-        "모네풍(인상파)": "Monet-inspired impressionist style",
-        "사진 스타일": "photorealistic photography style",
-        "손그림(드로잉)": "hand-drawn sketch style",
-        "크레용 스타일": "crayon drawing style",
-        "낙서(Doodle)": "doodle art style",
-        "팝아트 스타일": "pop art style",
-        "빈티지 포스터": "vintage poster style",
-        "신문지 콜라주": "newspaper clipping collage style",
-        "종이 질감 스타일": "paper texture style with torn edges",
-        "색종이 오려붙이기": "colored paper cut-out collage style",
-        "패턴 배경 스타일": "repeating pattern background style",
-        "혼합 매체": "mixed media style",
-        "사진+일러스트 혼합": "photo with hand-drawn illustration overlays",
-        "디지털 콜라주": "modern digital collage style",
-        "포토몽타주": "photomontage style",
-        "데콜라주": "décollage style with torn poster layers"
-    }
-    tone_dict = {
-        "따뜻한 파스텔톤": "warm pastel tones", "선명한 원색": "vivid primary colors",
-        "몽환적 퍼플": "dreamy purples", "차가운 블루": "cool blues", "빈티지 세피아": "vintage sepia",
-        "형광 네온": "neon tones", "모노톤 (흑백)": "monochrome", "대비 강한 컬러": "high-contrast colors",
-        "브라운 계열": "brown tones", "연보라+회색": "lavender and gray",
-        "다채로운 무지개": "rainbow colors", "연한 베이지": "light beige", "청록+골드": "teal and gold"
-    }
-    mood_dict = {
-        "몽환적": "dreamy", "고요함": "calm", "희망": "hopeful", "슬픔": "sad", "그리움": "nostalgic",
-        "설렘": "excited", "불안정함": "unstable", "자유로움": "free", "기대감": "anticipation",
-        "공허함": "empty", "감사함": "grateful", "외로움": "lonely", "기쁨": "joyful",
-        "어두움": "dark", "차분함": "serene", "위로": "comforting", "용기": "brave",
-        "무한함": "infinite", "즐거움": "joyful", "강렬함": "intense"
-    }
-    viewpoint_dict = {
-        "정면": "front view", "항공 시점": "aerial view", "클로즈업": "close-up", "광각": "wide angle",
-        "역광": "backlit", "뒷모습": "back view", "소프트 포커스": "soft focus", "하늘을 올려다보는 시점": "looking up"
-    }
+def variant_prompt(theme):
+    # 톤/시점을 바꿔가며 만들 때는 바뀐 시각 요소로 프롬프트를 새로 작성
+    # (원래 프롬프트 뒤에 덧붙이면 원래 톤과 새 톤을 동시에 요구하게 됨) → 작업 스레드에서 장마다 호출
+    def make(selection):
+        return build_prompt(chat, theme, selection, options, translate_to_prompt, use_ai=False)["prompt"]
+    return make
 
-    style_eng = style_dict.get(style, style)
-    tone_eng = tone_dict.get(tone, tone)
-    mood_eng = ", ".join([mood_dict.get(m, m) for m in mood]) if isinstance(mood, list) else mood_dict.get(mood, mood)
-    viewpoint_eng = viewpoint_dict.get(viewpoint, viewpoint)
-    return style_eng, tone_eng, mood_eng, viewpoint_eng
+def variant_grid(plan, cells):
+    # 끝난 칸은 작은 미리보기, 아직인 칸은 대기 표시
+    cols = st.columns(GRID_COLUMNS)
+    for index, item in enumerate(plan):
+        cell = cells[index] if index < len(cells) else None
+        with cols[index % GRID_COLUMNS]:
+            if cell is None:
+                st.info(f"⏳ {item['label']}")
+            elif "error" in cell:
+                st.error(f"❌ {item['label']}: {cell['error']}")
+            else:
+                st.image(previews.get(cell["ref"], "small"), caption=item["label"])
 
 # =========================
 # UI & 상태 기본값
@@ -132,10 +90,60 @@ def translate_to_prompt(style, tone, mood, viewpoint):
 options = get_options()
 # 이미지 관련 세션 기본값(KeyError 방지)
 st.session_state.setdefault("image_size", options["image_size"][0])
-st.session_state.setdefault("image_bytes", None)
+st.session_state.setdefault("image_ref", None)
 st.session_state.setdefault("image_url", None)
 st.session_state.setdefault("image_size_param", "1024x1024")
 st.session_state.setdefault("image_filename", "my_art_box_1024x1024.png")
+st.session_state.setdefault("image_job", None)
+st.session_state.setdefault("variants_job", None)
+st.session_state.setdefault("variant_plan", [])
+st.session_state.setdefault("variant_cells", [])
+
+# 백그라운드 작업 상태 확인 (이 부분만 POLL_SECONDS마다 다시 실행)
+@st.fragment(run_every=POLL_SECONDS)
+def show_image_job():
+    job = jobs.get(st.session_state.get("image_job"))
+    if job is None:
+        st.session_state["image_job"] = None
+        return
+    if job.active:
+        st.progress(job.progress, text=f"⏳ {job.message}")
+        return
+
+    # 끝난 작업 → 결과를 세션에 옮기고 전체 화면 다시 그리기
+    st.session_state["image_job"] = None
+    if job.status == DONE:
+        image_ref, image_url, size_param = job.result
+        # ✅ 세션에 저장 → rerun 후에도 계속 화면에 유지
+        st.session_state["image_url"] = image_url
+        st.session_state["image_ref"] = image_ref
+        st.session_state["image_size_param"] = size_param
+        st.session_state["image_filename"] = f"my_art_box_{size_param}.png"
+        st.session_state["image_notice"] = "✅ 이미지 생성 완료!"
+    else:
+        st.session_state["image_error"] = f"❌ 에러: {job.error}"
+    st.rerun()
+
+# 여러 장 생성 작업: 끝나는 칸부터 격자에 채워 보여줌
+@st.fragment(run_every=POLL_SECONDS)
+def show_variants_job():
+    job = jobs.get(st.session_state.get("variants_job"))
+    if job is None:
+        st.session_state["variants_job"] = None
+        return
+    if job.active:
+        st.progress(job.progress, text=f"⏳ {job.message}")
+        variant_grid(st.session_state["variant_plan"], job.detail.get("cells") or [])
+        return
+
+    st.session_state["variants_job"] = None
+    if job.status == DONE:
+        st.session_state["variant_cells"] = job.result
+        st.session_state["image_notice"] = "✅ 여러 장 생성 완료!"
+    else:
+        st.session_state["variant_cells"] = job.detail.get("cells") or []
+        st.session_state["image_error"] = f"❌ 에러: {job.error}"
+    st.rerun()
 
 left_col, right_col = st.columns([1, 2])
 
@@ -159,57 +167,44 @@ with left_col:
     if submitted:
         with st.spinner("프롬프트 생성 중..."):
             try:
-                # 사용자가 AI 추천 체크 시 스타일/톤/분위기/시점 제안 받기
-                if use_ai:
-                    instruction = f"""
-You are a creative assistant. Based on the theme, suggest:
-Style, Color tone, Mood(s), and Viewpoint (in Korean).
-Theme: {theme}
-Format:
-Style: ...
-Color tone: ...
-Mood: ...
-Viewpoint: ...
-"""
-                    ai_response = client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[{"role": "user", "content": instruction}]
-                    )
-                    response_text = ai_response.choices[0].message.content.strip()
-                    for line in response_text.splitlines():
-                        if line.startswith("Style:"):
-                            style = line.split(":", 1)[1].strip()
-                        elif line.startswith("Color tone:"):
-                            tone = line.split(":", 1)[1].strip()
-                        elif line.startswith("Mood:"):
-                            mood = [m.strip() for m in line.split(":", 1)[1].split(",")]
-                        elif line.startswith("Viewpoint:"):
-                            viewpoint = line.split(":", 1)[1].strip()
+                # 스트리밍: 오른쪽 칸에 프롬프트를 받는 대로 표시, 첫 토큰/전체 지연 기록
+                started = time.perf_counter()
+                latency = {"first_token": None, "total": None}
+                stream_box = right_col.empty()
 
-                style_eng, tone_eng, mood_eng, viewpoint_eng = translate_to_prompt(style, tone, mood, viewpoint)
+                def show_partial(text):
+                    if latency["first_token"] is None:
+                        latency["first_token"] = time.perf_counter() - started
+                    stream_box.code(text)
 
-                final_prompt = f"""
-Create a vivid English image prompt for DALL·E 3.
-Theme: {theme}
-Style: {style_eng}
-Color tone: {tone_eng}
-Mood: {mood_eng}
-Viewpoint: {viewpoint_eng}
-Only return the prompt.
-"""
-                prompt_response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[{"role": "user", "content": final_prompt}]
-                )
-                dalle_prompt = prompt_response.choices[0].message.content.strip()[:1000]
+                # AI 추천 체크 시 스타일/톤/분위기/시점 제안 + 프롬프트 생성
+                with span("prompt.build"):
+                    result = build_prompt(
+                        chat,
+                        theme,
+                        {"style": style, "tone": tone, "mood": mood, "viewpoint": viewpoint},
+                        options,
+                        translate_to_prompt,
+                        use_ai=use_ai,
+                        mode=PROMPT_MODE,
+                        chat_stream=chat_stream if STREAM_PROMPT else None,
+                        on_text=show_partial if STREAM_PROMPT else None,
+                        memo=suggestions,
+                    )
+                latency["total"] = time.perf_counter() - started
+                stream_box.empty()
+                style, tone, mood, viewpoint = result["style"], result["tone"], result["mood"], result["viewpoint"]
+                dalle_prompt = result["prompt"]
 
                 # 세션 저장
                 st.session_state["dalle_prompt"] = dalle_prompt
+                st.session_state["theme"] = theme
                 st.session_state["style"] = style
                 st.session_state["tone"] = tone
                 st.session_state["mood"] = mood
                 st.session_state["viewpoint"] = viewpoint
                 st.session_state["image_size"] = image_size
+                st.session_state["prompt_latency"] = latency
 
                 st.success("✅ 프롬프트 생성 완료!")
             except Exception as e:
@@ -219,6 +214,10 @@ with right_col:
     if "dalle_prompt" in st.session_state:
         st.markdown("### 📝 생성된 프롬프트")
         st.code(st.session_state["dalle_prompt"])
+        latency = st.session_state.get("prompt_latency")
+        if latency:
+            first = f"{latency['first_token']:.1f}초" if latency["first_token"] is not None else "-"
+            st.caption(f"⏱️ 첫 글자 {first} · 전체 {latency['total']:.1f}초")
         st.markdown(f"**🎨 스타일**: {st.session_state.get('style', '-')}")
         st.markdown(f"**🎨 색감**: {st.session_state.get('tone', '-')}")
         st.markdown(f"**💫 감정/분위기**: {', '.join(st.session_state.get('mood', []))}")
@@ -226,46 +225,90 @@ with right_col:
         st.markdown(f"**🖼️ 이미지 크기**: {st.session_state.get('image_size', '-')}")
 
         if st.button("🎨 이미지 생성하기"):
-            with st.spinner("이미지 생성 중..."):
-                try:
-                    # 이미지 크기 문자열 파싱 → DALL·E 3 파라미터로 변환
-                    selected_size = st.session_state.get("image_size", "1024x1024")
-                    if "1024x1792" in selected_size:
-                        size_param = "1024x1792"
-                    elif "1792x1024" in selected_size:
-                        size_param = "1792x1024"
-                    else:
-                        size_param = "1024x1024"
+            # 이미지 크기 문자열 파싱 → DALL·E 3 파라미터로 변환
+            size_param = to_size_param(st.session_state.get("image_size", "1024x1024"))
 
-                    image_response = client.images.generate(
-                        model="dall-e-3",
-                        prompt=st.session_state["dalle_prompt"],
-                        size=size_param,
-                        n=1
-                    )
-                    image_url = image_response.data[0].url
-                    image_bytes = requests.get(image_url).content
+            # 백그라운드 작업으로 시작 → 기다리는 동안에도 옵션을 계속 바꿀 수 있음
+            st.session_state["image_job"] = jobs.submit(
+                image_job, st.session_state["dalle_prompt"], size_param, generation_meta(), label=size_param
+            )
 
-                    # ✅ 세션에 저장 → rerun 후에도 계속 화면에 유지
-                    st.session_state["image_url"] = image_url
-                    st.session_state["image_bytes"] = image_bytes
-                    st.session_state["image_size_param"] = size_param
-                    st.session_state["image_filename"] = f"my_art_box_{size_param}.png"
+        with st.expander("🖼️ 여러 장 한 번에 만들기"):
+            count = st.slider("장 수", 2, MAX_VARIANTS, 4)
+            vary = st.radio("변화 주기", list(VARY_CHOICES), format_func=VARY_CHOICES.get, horizontal=True)
+            if st.button("🎨 여러 장 생성하기"):
+                size_param = to_size_param(st.session_state.get("image_size", "1024x1024"))
+                selection = {key: st.session_state.get(key) for key in ("style", "tone", "mood", "viewpoint")}
+                theme = generation_meta()["theme"]
+                # 같은 설정이면 지금 프롬프트 그대로, 톤/시점을 바꾸면 장마다 작업 스레드에서 새로 작성
+                base_prompt = st.session_state["dalle_prompt"]
+                plan = plan_variants(selection, count, vary, (lambda _: base_prompt) if vary == "none" else None)
+                st.session_state["variant_plan"] = plan
+                st.session_state["variant_cells"] = []
+                st.session_state["variant_size_param"] = size_param
+                st.session_state["variants_job"] = jobs.submit(
+                    variants_job, plan, size_param, generate_image_ref, max_concurrency=VARIANT_CONCURRENCY,
+                    record=variant_recorder(theme, size_param), make_prompt=variant_prompt(theme),
+                    label=f"variants x{len(plan)}"
+                )
 
-                    st.success("✅ 이미지 생성 완료!")
-                except Exception as e:
-                    st.error(f"❌ 에러: {e}")
+    if st.session_state.get("image_job"):
+        show_image_job()
+    if st.session_state.get("variants_job"):
+        show_variants_job()
+    if st.session_state.get("image_notice"):
+        st.success(st.session_state.pop("image_notice"))
+    if st.session_state.get("image_error"):
+        st.error(st.session_state.pop("image_error"))
 
     # ✅ 생성된 이미지가 있으면 항상 표기 + 다운로드 버튼 유지
-    if st.session_state.get("image_bytes"):
+    image_ref = st.session_state.get("image_ref")
+    preview = previews.get(image_ref, PREVIEW_SIZE) if image_ref else None
+    if preview:
         st.image(
-            st.session_state["image_bytes"],
+            preview,
             caption=f"🎉 생성된 이미지 ({st.session_state.get('image_size_param', '1024x1024')})"
         )
         st.download_button(
             label=f"📥 이미지 다운로드 ({st.session_state.get('image_size_param', '1024x1024')})",
-            data=st.session_state["image_bytes"],
+            data=previews.original(image_ref),
             file_name=st.session_state.get("image_filename", "my_art_box.png"),
             mime="image/png",
             key="download_latest"  # rerun에도 안정적으로 유지
         )
+
+    # ✅ 여러 장 결과: 격자 + 전체 ZIP 다운로드 (ZIP은 버튼을 누를 때 만듦)
+    variant_cells = st.session_state.get("variant_cells")
+    if variant_cells and not st.session_state.get("variants_job"):
+        variant_grid(st.session_state["variant_plan"], variant_cells)
+        variant_refs = [cell["ref"] for cell in variant_cells if cell and "ref" in cell]
+        if variant_refs:
+            st.download_button(
+                label=f"📦 전체 다운로드 ({len(variant_refs)}장, ZIP)",
+                data=lambda: zip_images(blobs, variant_refs),
+                file_name=f"my_art_box_{st.session_state.get('variant_size_param', '1024x1024')}.zip",
+                mime="application/zip",
+                key="download_variants"
+            )
+
+# =========================
+# 지난 작품 모아보기 (켰을 때만 불러옴)
+# =========================
+if st.toggle("🗂️ 지난 작품 모아보기", key="show_gallery"):
+    show_gallery(get_gallery(), previews, options)
+
+# =========================
+# 디버그 패널 (켰을 때만) + 이번 실행 시간 기록
+# =========================
+if debug_enabled(setting):
+    sources = {
+        "jobs": jobs.stats,
+        "rate_limiter": get_rate_limiter().stats,
+        "image_cache": get_image_cache().stats,
+        "blob_store": blobs.stats,
+    }
+    if suggestions is not None:
+        sources["suggestions"] = suggestions.stats
+    with st.sidebar:
+        show_debug_panel(sources)
+observe("script.run", time.perf_counter() - run_started)
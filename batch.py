@@ -0,0 +1,339 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from core.blob_store import BlobStore
+from core.gallery import referenced_refs
+from core.image_cache import ImageCache
+from core.image_fetch import MODES as FETCH_MODES, make_http_session
+from core.openai_calls import cached_image, chat_text
+from core.options import OPTIONS, size_param, translate_to_prompt
+from core.prompt_engine import build_prompt, template_prompt
+from core.rate_limit import DEFAULT_RPM, RateLimiter
+
+# =========================
+# 화면 없이 여러 주제의 이미지를 한꺼번에 만드는 명령줄 도구
+# - 입력: CSV 또는 JSONL (theme, style, tone, mood, viewpoint, size 열)
+# - 출력: 폴더 또는 .zip + manifest.jsonl (행마다 프롬프트/파일/소요 시간 기록, zip이면 zip 옆에)
+# - 끝난 행은 manifest에 바로 기록 → 중간에 끊겨도 다시 실행하면 남은 행만 생성
+# - 생성된 이미지는 앱과 같은 디스크 캐시(.image_cache → .blobs)에도 저장 → 같은 요청은 다시 비용을 내지 않음
+# 프롬프트 방식:
+#   template  : app.py 수동 생성 문장 틀 (API 호출 없음)
+#   translate : app2.py처럼 고른 값을 영어로 바꿔 gpt-4o가 프롬프트 작성
+#   suggest   : app2.py의 AI 추천 (시각 요소 추천 + 프롬프트)
+# 실행: python batch.py themes.csv --out images.zip --concurrency 4
+# =========================
+PROMPT_MODES = ("template", "translate", "suggest")
+DEFAULT_MOOD = ["몽환적"]
+MANIFEST_NAME = "manifest.jsonl"
+ROOT = Path(__file__).resolve().parent
+
+
+def api_key(explicit=None):
+    # --api-key → 환경 변수 → 앱과 같은 .streamlit/secrets.toml 순서로 찾음
+    if explicit:
+        return explicit
+    if os.environ.get("OPENAI_API_KEY"):
+        return os.environ["OPENAI_API_KEY"]
+    secrets = ROOT / ".streamlit" / "secrets.toml"
+    if secrets.exists():
+        import tomllib
+
+        with secrets.open("rb") as f:
+            key = tomllib.load(f).get("api_key")
+        if key:
+            return key
+    raise SystemExit("API 키가 없습니다: --api-key, OPENAI_API_KEY 또는 .streamlit/secrets.toml의 api_key")
+
+
+# =========================
+# 입력 읽기
+# =========================
+def split_mood(value):
+    if isinstance(value, list):
+        return [str(m).strip() for m in value if str(m).strip()]
+    for sep in ("|", "/"):
+        value = str(value).replace(sep, ",")
+    return [m.strip() for m in value.split(",") if m.strip()]
+
+
+SIZES = tuple(size_param(label) for label in OPTIONS["image_size"])
+
+
+def _check_option(name, value):
+    if value not in OPTIONS[name]:
+        raise ValueError(f"{name} '{value}'은(는) 앱의 선택지에 없음")
+    return value
+
+
+def normalize_row(raw):
+    # 앱 선택지에 없는 값은 조용히 바꾸지 않고 ValueError → 그 행은 건너뜀 (잘못된 설정으로 비용을 내지 않도록)
+    row = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+    theme = str(row.get("theme") or "").strip()
+    if not theme:
+        raise ValueError("주제가 없음")
+    # "1024x1792 (세로형)" 같은 화면 표시 문자열도 그대로 받음
+    size = str(row.get("size") or "1024x1024").strip()
+    if not size.split() or size.split()[0] not in SIZES:
+        raise ValueError(f"size '{size}'은(는) 지원하지 않음 ({', '.join(SIZES)})")
+    return {
+        "theme": theme,
+        "style": _check_option("style", str(row.get("style") or OPTIONS["style"][0]).strip()),
+        "tone": _check_option("tone", str(row.get("tone") or OPTIONS["tone"][0]).strip()),
+        "mood": [_check_option("mood", m) for m in split_mood(row.get("mood") or "")] or list(DEFAULT_MOOD),
+        "viewpoint": _check_option("viewpoint", str(row.get("viewpoint") or OPTIONS["viewpoint"][0]).strip()),
+        "size": size_param(size),
+        "id": str(row["id"]).strip() if row.get("id") else None,
+    }
+
+
+def read_rows(path):
+    path = Path(path)
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        with path.open(encoding="utf-8") as f:
+            raws = [json.loads(line) for line in f if line.strip()]
+    else:
+        # 엑셀에서 저장한 CSV의 BOM도 처리
+        with path.open(encoding="utf-8-sig", newline="") as f:
+            raws = list(csv.DictReader(f))
+
+    rows, seen = [], {}
+    for number, raw in enumerate(raws, start=1):
+        try:
+            row = normalize_row(raw)
+        except ValueError as e:
+            print(f"  {number}행: {e} → 건너뜀", file=sys.stderr)
+            continue
+        content = json.dumps([row[k] for k in ("theme", "style", "tone", "mood", "viewpoint", "size")],
+                             ensure_ascii=False)
+        # 같은 내용의 행이 여러 번 있으면 장마다 다른 이미지가 나오도록 변형 번호를 붙임
+        row["variant"] = seen.get(content, 0)
+        seen[content] = row["variant"] + 1
+        if row["id"] is None:
+            row["id"] = hashlib.sha256(f"{content}#{row['variant']}".encode("utf-8")).hexdigest()[:16]
+        row["number"] = number
+        rows.append(row)
+    return rows
+
+
+# =========================
+# 출력 (폴더 / zip) + 체크포인트
+# =========================
+class DirectoryOutput:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.path / MANIFEST_NAME
+
+    def has(self, name):
+        return (self.path / name).exists()
+
+    def write(self, name, data):
+        tmp = self.path / f".{name}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, self.path / name)
+
+    def close(self):
+        pass
+
+
+class ZipOutput:
+    # 끝나는 대로 zip에 바로 추가, manifest는 zip 옆에 (<이름>.zip.manifest.jsonl)
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.path.with_name(self.path.name + "." + MANIFEST_NAME)
+        # 비정상 종료로 zip 목차가 깨졌으면 새로 만듦 (끝난 행은 이미지 캐시에서 무료로 다시 채워짐)
+        mode = "a" if self.path.exists() and zipfile.is_zipfile(self.path) else "w"
+        self._zip = zipfile.ZipFile(self.path, mode, compression=zipfile.ZIP_STORED)
+        self._names = set(self._zip.namelist())
+        self._lock = threading.Lock()
+
+    def has(self, name):
+        return name in self._names
+
+    def write(self, name, data):
+        with self._lock:
+            if name not in self._names:
+                self._zip.writestr(name, data)
+                self._names.add(name)
+
+    def close(self):
+        with self._lock:
+            self._zip.close()
+
+
+class Checkpoint:
+    # manifest.jsonl에 한 줄씩 추가 (같은 id가 여러 번 나오면 마지막 줄 기준)
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self):
+        entries = {}
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue   # 기록 도중 끊긴 마지막 줄
+                    entries[entry["id"]] = entry
+        return entries
+
+    def record(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# =========================
+# 생성
+# =========================
+class Generator:
+    def __init__(self, client, limiter, prompt_mode="template", fetch_mode="b64", cache=None):
+        self.client = client
+        self.limiter = limiter
+        self.prompt_mode = prompt_mode
+        self.fetch_mode = fetch_mode
+        if cache is None:
+            # 앱과 같은 .blobs를 쓰므로 앱처럼 갤러리 원본을 고정 (배치의 용량 정리에서 지워지지 않게)
+            blobs = BlobStore()
+            blobs.pin(referenced_refs())
+            cache = ImageCache(blobs=blobs)
+        self.cache = cache
+        self.http = make_http_session()
+
+    def chat(self, messages, **kwargs):
+        return chat_text(self.limiter, self.client, messages, **kwargs)
+
+    def prompt(self, row):
+        selection = {name: row[name] for name in ("style", "tone", "mood", "viewpoint")}
+        if self.prompt_mode == "template":
+            return template_prompt(row["theme"], selection), selection
+        result = build_prompt(
+            self.chat, row["theme"], selection, OPTIONS, translate_to_prompt,
+            use_ai=self.prompt_mode == "suggest",
+        )
+        return result["prompt"], {name: result[name] for name in selection}
+
+    def image(self, prompt, size, variant=0):
+        # → (PNG 바이트, 캐시 사용 여부)
+        data, _, cached = cached_image(self.cache, self.limiter, self.client, self.http, prompt, size,
+                                       mode=self.fetch_mode, variant=variant)
+        return data, cached
+
+
+def file_name(row):
+    return f"{row['number']:04d}_{row['id'][:8]}_{row['size']}.png"
+
+
+def run_row(generator, output, row, previous=None):
+    started = time.perf_counter()
+    # 이전 실행에서 프롬프트까지 만들었으면 그대로 사용 (AI 프롬프트 호출 비용 절약)
+    if previous and previous.get("prompt"):
+        prompt, attributes = previous["prompt"], previous.get("attributes", {})
+    else:
+        prompt, attributes = generator.prompt(row)
+    data, cached = generator.image(prompt, row["size"], row["variant"])
+    name = file_name(row)
+    output.write(name, data)
+    return {
+        "id": row["id"],
+        "status": "done",
+        "row": row["number"],
+        "theme": row["theme"],
+        "attributes": attributes,
+        "size": row["size"],
+        "prompt": prompt,
+        "file": name,
+        "bytes": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "cached": cached,
+        "seconds": round(time.perf_counter() - started, 2),
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_batch(rows, generator, output, checkpoint, concurrency=4, log=print):
+    previous = checkpoint.load()
+    todo = [
+        row for row in rows
+        if not (previous.get(row["id"], {}).get("status") == "done" and output.has(previous[row["id"]]["file"]))
+    ]
+    log(f"전체 {len(rows)}행 · 이미 완료 {len(rows) - len(todo)}행 · 이번에 생성 {len(todo)}행")
+
+    summary = {"done": 0, "failed": 0, "cached": 0}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch") as pool:
+        futures = {pool.submit(run_row, generator, output, row, previous.get(row["id"])): row for row in todo}
+        for count, future in enumerate(as_completed(futures), start=1):
+            row = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                entry = {"id": row["id"], "status": "failed", "row": row["number"], "theme": row["theme"],
+                         "error": str(e)}
+                summary["failed"] += 1
+                log(f"[{count}/{len(todo)}] ❌ {row['number']}행 '{row['theme']}': {e}")
+            else:
+                summary["done"] += 1
+                summary["cached"] += entry["cached"]
+                note = "캐시" if entry["cached"] else f"{entry['seconds']:.1f}초"
+                log(f"[{count}/{len(todo)}] ✅ {entry['file']} ({note})")
+            checkpoint.record(entry)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV/JSONL의 주제들로 이미지를 한꺼번에 생성")
+    parser.add_argument("input", help="CSV 또는 JSONL 파일 (theme, style, tone, mood, viewpoint, size)")
+    parser.add_argument("--out", default="batch_output", help="출력 폴더 또는 .zip 경로")
+    parser.add_argument("--prompt", choices=PROMPT_MODES, default="template", help="프롬프트 생성 방식")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 처리할 행 수")
+    parser.add_argument("--images-rpm", type=int, default=DEFAULT_RPM["images"], help="이미지 생성 분당 요청 수")
+    parser.add_argument("--chat-rpm", type=int, default=DEFAULT_RPM["chat"], help="프롬프트 생성 분당 요청 수")
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="b64", help="이미지 수신 방식")
+    parser.add_argument("--api-key")
+    args = parser.parse_args()
+
+    rows = read_rows(args.input)
+    if not rows:
+        raise SystemExit("생성할 행이 없습니다.")
+
+    from openai import OpenAI
+
+    # 재시도는 RateLimiter가 맡으므로 클라이언트 자체 재시도는 끔
+    client = OpenAI(api_key=api_key(args.api_key), max_retries=0)
+    limiter = RateLimiter(rpm={"images": args.images_rpm, "chat": args.chat_rpm})
+    generator = Generator(client, limiter, prompt_mode=args.prompt, fetch_mode=args.fetch_mode)
+    output = ZipOutput(args.out) if args.out.lower().endswith(".zip") else DirectoryOutput(args.out)
+    checkpoint = Checkpoint(output.manifest_path)
+
+    started = time.perf_counter()
+    try:
+        summary = run_batch(rows, generator, output, checkpoint, concurrency=args.concurrency)
+    finally:
+        output.close()
+    print(
+        f"완료 {summary['done']}행 (캐시 {summary['cached']}) · 실패 {summary['failed']}행 · "
+        f"{time.perf_counter() - started:.1f}초 → {args.out}"
+    )
+    if summary["failed"]:
+        print("실패한 행은 같은 명령으로 다시 실행하면 그 행만 다시 시도합니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
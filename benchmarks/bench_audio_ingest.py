@@ -0,0 +1,79 @@
+import argparse
+import shutil
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+import av
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from core.audio_ingest import transcode_pyav  # noqa: E402
+
+# =========================
+# 음성 입력 변환 벤치마크 (API 호출 없음)
+# - 기존: pydub로 webm → wav (ffmpeg 실행, 48kHz 그대로)
+# - 원본 전송: 변환 없이 WebM/Opus 그대로
+# - PyAV: 프로세스 안에서 16kHz 모노 FLAC
+# 실행: python benchmarks/bench_audio_ingest.py --seconds 8 --rounds 10
+# =========================
+
+
+def make_recording(seconds, rate=48000):
+    # 마이크 녹음과 비슷한 WebM/Opus 샘플 (말소리 대신 잡음 섞인 여러 주파수)
+    rng = np.random.default_rng(0)
+    t = np.arange(int(rate * seconds)) / rate
+    signal = sum(np.sin(2 * np.pi * f * t) for f in (220, 440, 880)) * 3000 + rng.normal(0, 800, t.size)
+    pcm = signal.astype(np.int16)
+    out = BytesIO()
+    with av.open(out, "w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=rate, layout="mono")
+        for i in range(0, pcm.size, 960):
+            frame = av.AudioFrame.from_ndarray(pcm[i:i + 960].reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = rate
+            frame.pts = i
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return out.getvalue()
+
+
+def pydub_original(audio_bytes):
+    # 기존 app.py 경로 그대로
+    from pydub import AudioSegment
+
+    webm_audio = AudioSegment.from_file(BytesIO(audio_bytes), format="webm", codec="opus")
+    wav_buffer = BytesIO()
+    webm_audio.export(wav_buffer, format="wav")
+    return wav_buffer.getvalue()
+
+
+def measure(name, fn, audio_bytes, rounds):
+    data = fn(audio_bytes)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(audio_bytes)
+    elapsed = (time.perf_counter() - started) / rounds
+    print(f"{name:<26} {elapsed * 1000:8.2f} ms/회   업로드 {len(data) / 1024:8.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    audio_bytes = make_recording(args.seconds)
+    print(f"녹음 길이 {args.seconds}초, {args.rounds}회 평균")
+    measure("원본 WebM/Opus 전송", lambda data: data, audio_bytes, args.rounds)
+    measure("PyAV 16kHz 모노 FLAC", transcode_pyav, audio_bytes, args.rounds)
+    if shutil.which("ffmpeg"):
+        measure("기존 pydub → WAV", pydub_original, audio_bytes, args.rounds)
+    else:
+        print("기존 pydub → WAV            ffmpeg가 없어 건너뜀")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import base64
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from core.image_fetch import decode_b64, download, make_http_session  # noqa: E402
+
+# =========================
+# 이미지 수신 방식 벤치마크 (로컬 HTTP 서버, API 호출 없음)
+# - 기존: requests.get(url).content (매번 새 연결, 타임아웃 없음)
+# - url 모드: 연결 재사용 세션 + 스트리밍
+# - b64 모드: 생성 응답 안의 base64 문자열 디코딩 (추가 요청 없음)
+# 실행: python benchmarks/bench_image_fetch.py --size-mb 3 --rounds 20
+# =========================
+
+
+def start_server(payload):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(name, fn, rounds):
+    fn()  # 준비 실행
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = (time.perf_counter() - started) / rounds
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} {elapsed * 1000:8.2f} ms/회   최대 메모리 {peak / 1024 / 1024:6.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=3.0)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = os.urandom(int(args.size_mb * 1024 * 1024))
+    b64_text = base64.b64encode(payload).decode("ascii")
+    server = start_server(payload)
+    url = f"http://127.0.0.1:{server.server_address[1]}/image.png"
+    session = make_http_session()
+
+    print(f"이미지 크기 {args.size_mb} MB, {args.rounds}회 평균")
+    measure("기존 requests.get().content", lambda: requests.get(url).content, args.rounds)
+    measure("url 모드 (세션+스트리밍)", lambda: download(session, url), args.rounds)
+    measure("b64 모드 (디코딩만)", lambda: decode_b64(b64_text), args.rounds)
+    measure("base64.b64decode (참고)", lambda: base64.b64decode(b64_text), args.rounds)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
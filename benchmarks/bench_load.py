@@ -0,0 +1,396 @@
+import argparse
+import base64
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# =========================
+# 동시 사용자 부하 테스트 (가짜 OpenAI 서버 사용, API 비용 없음)
+# - form : app2.py 주제 입력 → 프롬프트 생성 → 이미지 생성
+# - voice: app.py 녹음 → 음성 인식 → 이미지 생성
+# 동시 사용자 수를 늘려가며(--levels) 학생마다 AppTest 세션 하나를 스레드로 돌리고
+# 구간별 p50/p95/p99 지연, 처리량, 세션당 메모리를 표로 출력
+# 단계마다 새 프로세스 + 코드 임시 복사본에서 실행 → 캐시/갤러리가 비어 있는 상태에서 시작, 저장소 폴더는 건드리지 않음
+# 가짜 서버 지연은 실제와 비슷한 값을 --speed 배수만큼 줄여서 사용 (10이면 이미지 생성 약 1초)
+# 실행: python benchmarks/bench_load.py --levels 1,2,4,8 --speed 10
+#       python benchmarks/bench_load.py --flow voice --rate-limit-rate 0.05 --error-rate 0.02
+# =========================
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+FLOWS = ("form", "voice", "mixed")
+APP_FILES = ("app.py", "app2.py")
+SERVER_STAGES = ("job.queue_wait", "chat.stream", "transcription", "images.generate")
+# share_runtime()이 Streamlit 내부 구조를 바꿔 끼우므로 확인한 버전에서만 실행 (requirements.txt는 버전 고정 없음)
+TESTED_STREAMLIT = ((1, 65), (1, 65))     # (가장 낮은, 가장 높은) 메이저.마이너
+
+
+def check_streamlit(allow_untested=False):
+    import streamlit
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    version = tuple(int(part) for part in streamlit.__version__.split(".")[:2])
+    low, high = TESTED_STREAMLIT
+    if not low <= version <= high and not allow_untested:
+        raise SystemExit(
+            f"이 부하 테스트는 Streamlit {low[0]}.{low[1]}~{high[0]}.{high[1]}에서 확인했습니다 "
+            f"(설치된 버전 {streamlit.__version__}). AppTest 내부를 바꿔 끼우므로 다른 버전에서는 조용히 틀릴 수 있어요. "
+            f"확인 후 TESTED_STREAMLIT를 늘리거나 --allow-untested-streamlit로 실행하세요."
+        )
+    missing = [
+        name for owner, name in (
+            (Runtime, "_instance"), (app_test, "ScriptCache"), (local_script_runner, "ScriptCache"),
+        ) if not hasattr(owner, name)
+    ]
+    if missing:
+        raise SystemExit(f"Streamlit {streamlit.__version__}에 부하 테스트가 쓰는 내부 항목이 없습니다: {', '.join(missing)}")
+
+
+# =========================
+# 자식 프로세스: 한 단계(동시 사용자 N명) 실행
+# =========================
+def share_runtime():
+    # AppTest는 세션 하나만 가정하고 실행할 때마다 전역 상태를 바꿨다가 되돌림
+    # 여러 세션을 스레드로 동시에 돌리면 서로의 실행 도중에 그 상태가 사라지므로 실제 서버처럼 하나로 고정
+    # - Runtime: 마지막으로 만들어진 것을 모든 세션이 계속 사용
+    # - global.appTest 설정: 항상 켜 둠 (실행마다 켰다 끄는 사이에 다른 세션의 selectbox 정보가 빠짐)
+    # - ScriptCache: 하나를 공유해 스크립트를 한 번만 컴파일 (ast.parse를 동시에 부르면 깨짐)
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    config.set_option("global.appTest", True)
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    shared = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            shared[:] = [cls._instance]
+        if not shared:
+            raise RuntimeError("Runtime hasn't been created!")
+        return shared[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(shared))
+
+
+def rss_bytes():
+    # 현재 프로세스 실제 메모리 사용량 (리눅스 /proc)
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class MemoryMonitor:
+    def __init__(self, interval=0.05):
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), daemon=True)
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+class Student:
+    def __init__(self, workdir, number, flow, recording, poll, timeout):
+        self.workdir = Path(workdir)
+        self.number = number
+        self.flow = flow
+        self.recording = recording
+        self.poll = poll
+        self.timeout = timeout
+        self.samples = []      # {"flow", "stage", "seconds"}
+        self.reruns = []       # 결과를 기다리는 동안 한 번 다시 실행하는 데 걸린 시간
+        self.errors = []
+        self.completed = 0
+
+    def _app(self, name):
+        from streamlit.testing.v1 import AppTest
+
+        return AppTest.from_file(str(self.workdir / name), default_timeout=self.timeout)
+
+    @staticmethod
+    def _click(at, label):
+        button = next((b for b in at.button if label in b.label), None)
+        if button is None:
+            raise RuntimeError(f"'{label}' 버튼 없음")
+        button.click().run()
+
+    def _record(self, flow, stage, seconds):
+        self.samples.append({"flow": flow, "stage": stage, "seconds": seconds})
+
+    def _wait(self, at, key):
+        # 실제 화면의 폴링(st.fragment run_every)처럼 작업이 끝날 때까지 주기적으로 다시 실행
+        deadline = time.perf_counter() + self.timeout
+        while at.session_state[key]:
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"{key} 시간 초과")
+            time.sleep(self.poll)
+            started = time.perf_counter()
+            at.run()
+            self.reruns.append(time.perf_counter() - started)
+
+    def _check(self, at, flow):
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        errors = [e.value for e in at.error]
+        if errors:
+            raise RuntimeError(errors[0])
+        if not at.session_state["image_ref"]:
+            raise RuntimeError(f"{flow}: 이미지 없음")
+
+    def form(self, at, round_number):
+        started = time.perf_counter()
+        at.text_input[0].set_value(f"학생 {self.number}의 꿈 {round_number} {time.time_ns()}")
+        self._click(at, "프롬프트 생성")
+        self._record("form", "prompt", time.perf_counter() - started)
+        if at.exception or at.error:
+            self._check(at, "form")
+
+        image_started = time.perf_counter()
+        self._click(at, "이미지 생성하기")
+        self._wait(at, "image_job")
+        self._record("form", "image", time.perf_counter() - image_started)
+        self._check(at, "form")
+        self._record("form", "total", time.perf_counter() - started)
+
+    def voice(self, at, round_number):
+        started = time.perf_counter()
+        # 마이크 녹음 컴포넌트가 돌려주는 값과 같은 모양 (id가 커질 때마다 새 녹음으로 처리)
+        at.session_state["voice_input"] = {
+            "id": round_number + 1,
+            "audio_base64": self.recording,
+            "sample_rate": 48000,
+            "sample_width": 2,
+            "format": "webm",
+        }
+        at.run()
+        self._wait(at, "image_job")
+        self._check(at, "voice")
+        self._record("voice", "total", time.perf_counter() - started)
+
+    def run(self, rounds):
+        flow = self.flow if self.flow != "mixed" else ("form", "voice")[self.number % 2]
+        started = time.perf_counter()
+        at = self._app("app2.py" if flow == "form" else "app.py").run()
+        self._record(flow, "load", time.perf_counter() - started)
+        for round_number in range(rounds):
+            try:
+                getattr(self, flow)(at, round_number)
+                self.completed += 1
+            except Exception as e:
+                self.errors.append(f"{flow}: {e}")
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(q * (len(values) - 1)))))
+    return values[index]
+
+
+def run_level(workdir, students, flow, rounds, poll, timeout):
+    sys.path.insert(0, str(BENCH_DIR))
+    from bench_audio_ingest import make_recording
+
+    os.chdir(workdir)     # .streamlit/secrets.toml을 실제 서버처럼 파일에서 읽도록
+    sys.path.insert(0, str(workdir))
+    share_runtime()
+    recording = base64.b64encode(make_recording(3.0)).decode("ascii")
+
+    # 준비 실행: import와 공용 자원 생성은 측정에서 제외
+    for name in APP_FILES:
+        Student(workdir, -1, "form", recording, poll, timeout)._app(name).run()
+    baseline = rss_bytes()
+
+    group = [Student(workdir, number, flow, recording, poll, timeout) for number in range(students)]
+    threads = [threading.Thread(target=s.run, args=(rounds,), name=f"student-{s.number}") for s in group]
+    started = time.perf_counter()
+    with MemoryMonitor() as memory:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    stages = {}
+    for student in group:
+        for sample in student.samples:
+            stages.setdefault(f"{sample['flow']}.{sample['stage']}", []).append(sample["seconds"])
+    reruns = [seconds for student in group for seconds in student.reruns]
+    completed = sum(s.completed for s in group)
+
+    from core.tracing import get_tracer
+
+    return {
+        "students": students,
+        "elapsed": elapsed,
+        "completed": completed,
+        "errors": [error for s in group for error in s.errors],
+        "throughput_per_min": 60 * completed / elapsed if elapsed else 0.0,
+        "stages": {
+            name: {"count": len(values), **{f"p{q}": percentile(values, q / 100) for q in (50, 95, 99)}}
+            for name, values in sorted(stages.items())
+        },
+        "rerun": {f"p{q}": percentile(reruns, q / 100) for q in (50, 95, 99)},
+        "memory": {
+            "baseline_mb": baseline / 2**20,
+            "peak_mb": memory.peak / 2**20,
+            "per_session_mb": (memory.peak - baseline) / 2**20 / students,
+        },
+        "server_stages": get_tracer().summary(),
+    }
+
+
+# =========================
+# 부모 프로세스: 가짜 서버 띄우기 + 단계별 자식 실행 + 표 출력
+# =========================
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(args):
+    port = free_port()
+    command = [
+        sys.executable, str(BENCH_DIR / "mock_openai.py"), "--port", str(port), "--speed", str(args.speed),
+        "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate),
+        "--image-side", str(args.image_side),
+    ]
+    if args.images_rpm:
+        command += ["--images-rpm", str(args.images_rpm)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("가짜 OpenAI 서버가 시작되지 않았습니다.")
+
+
+def prepare_workdir(base_url, args):
+    # 앱 코드만 임시 폴더에 복사 + 가짜 서버를 가리키는 secrets.toml
+    workdir = Path(tempfile.mkdtemp(prefix="drawing-box-load-"))
+    for name in APP_FILES:
+        shutil.copy2(ROOT / name, workdir / name)
+    shutil.copytree(ROOT / "core", workdir / "core", ignore=shutil.ignore_patterns("__pycache__"))
+    (workdir / ".streamlit").mkdir()
+    (workdir / ".streamlit" / "secrets.toml").write_text(
+        f'api_key = "sk-load-test"\n'
+        f'cutoff = "2099-12-31 23:59:59"\n'
+        f'openai_base_url = "{base_url}"\n'
+        f'image_fetch_mode = "{args.fetch_mode}"\n'
+        f'max_image_jobs = {args.max_image_jobs}\n',
+        encoding="utf-8",
+    )
+    return workdir
+
+
+def ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def print_level(result):
+    memory = result["memory"]
+    print(
+        f"\n동시 사용자 {result['students']}명 · 완료 {result['completed']}건 · 오류 {len(result['errors'])}건 · "
+        f"{result['elapsed']:.1f}초 · 처리량 {result['throughput_per_min']:.1f}건/분 · "
+        f"세션당 메모리 {memory['per_session_mb']:.1f}MB (최대 {memory['peak_mb']:.0f}MB)"
+    )
+    print(f"  {'구간':<16} {'횟수':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in result["stages"].items():
+        print(f"  {name:<16} {stats['count']:>5} {ms(stats['p50']):>9} {ms(stats['p95']):>9} {ms(stats['p99']):>9}")
+    rerun = result["rerun"]
+    print(f"  {'(대기 중 rerun)':<16} {'':>5} {ms(rerun['p50']):>9} {ms(rerun['p95']):>9} {ms(rerun['p99']):>9}")
+    # 앱 안쪽에서 잰 구간 (core.tracing): 작업 대기열, OpenAI 호출, 재시도
+    inner = [
+        f"{stage} p95 {ms(stats['p95_seconds'])}ms" + (f" (재시도 {stats['retries']})" if stats["retries"] else "")
+        for stage, stats in result["server_stages"].items() if stage in SERVER_STAGES
+    ]
+    if inner:
+        print("  " + " · ".join(inner))
+    for error in result["errors"][:3]:
+        print(f"  ❌ {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flow", choices=FLOWS, default="mixed", help="form(app2) / voice(app) / mixed(반반)")
+    parser.add_argument("--levels", default="1,2,4,8", help="동시 사용자 수 (쉼표로 구분)")
+    parser.add_argument("--rounds", type=int, default=2, help="학생 한 명이 반복하는 횟수")
+    parser.add_argument("--speed", type=float, default=10.0, help="가짜 서버 지연을 이 배수만큼 줄임")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--images-rpm", type=int, help="가짜 서버의 이미지 분당 한도 (넘으면 429)")
+    parser.add_argument("--image-side", type=int, default=1024)
+    parser.add_argument("--fetch-mode", choices=("b64", "url"), default="b64")
+    parser.add_argument("--max-image-jobs", type=int, default=4, help="앱의 동시 이미지 작업 수")
+    parser.add_argument("--poll", type=float, default=0.5, help="결과를 기다리며 다시 실행하는 간격(초)")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="결과를 JSON 파일로도 저장")
+    parser.add_argument("--allow-untested-streamlit", action="store_true", help="확인하지 않은 Streamlit 버전에서도 실행")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--students", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    check_streamlit(args.allow_untested_streamlit)
+
+    if args.child:
+        result = run_level(Path(args.child), args.students, args.flow, args.rounds, args.poll, args.timeout)
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    mock, base_url = start_mock(args)
+    results = []
+    print(f"흐름 {args.flow} · 가짜 서버 {args.speed:g}배속 · 오류 {args.error_rate:.0%} · 429 {args.rate_limit_rate:.0%}")
+    try:
+        for students in [int(level) for level in args.levels.split(",")]:
+            workdir = prepare_workdir(base_url, args)
+            try:
+                process = subprocess.run(
+                    [sys.executable, __file__, "--child", str(workdir), "--students", str(students),
+                     "--flow", args.flow, "--rounds", str(args.rounds), "--poll", str(args.poll),
+                     "--timeout", str(args.timeout)]
+                    + (["--allow-untested-streamlit"] if args.allow_untested_streamlit else []),
+                    capture_output=True, text=True,
+                )
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            if process.returncode != 0:
+                print(f"\n동시 사용자 {students}명: 실패 {process.stderr.strip().splitlines()[-1:]}")
+                continue
+            result = json.loads(process.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print_level(result)
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# =========================
+# 다시 실행(rerun) 지연 + 첫 실행(cold start) 벤치마크 (API 호출 없음)
+# Streamlit AppTest로 앱 스크립트를 그대로 실행해 시간만 잼
+# - cold: 새 프로세스에서 첫 실행 (import 포함)
+# - rerun: 같은 세션에서 위젯 조작 없이 다시 실행한 평균
+# 실행: python benchmarks/bench_rerun.py --reruns 30
+#       python benchmarks/bench_rerun.py --app /다른/경로/app2.py   (이전 버전과 비교할 때)
+# =========================
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_once(app, reruns):
+    # 자식 프로세스에서 실행 → 결과를 JSON 한 줄로 출력
+    from streamlit.testing.v1 import AppTest
+
+    started = time.perf_counter()
+    at = AppTest.from_file(app, default_timeout=60)
+    at.secrets["api_key"] = "sk-benchmark"
+    at.secrets["cutoff"] = "2099-12-31 23:59:59"
+    at.run()
+    cold = time.perf_counter() - started
+    if at.exception:
+        raise SystemExit(f"{app}: {at.exception[0].value}")
+
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(json.dumps({
+        "cold_ms": cold * 1000,
+        "rerun_avg_ms": 1000 * sum(timings) / len(timings),
+        "rerun_p50_ms": 1000 * timings[len(timings) // 2],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", action="append", help="앱 스크립트 경로 (여러 번 지정 가능)")
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    apps = args.app or [str(ROOT / "app.py"), str(ROOT / "app2.py")]
+    if args.child:
+        run_once(apps[0], args.reruns)
+        return
+
+    print(f"{'앱':<40} {'첫 실행':>10} {'rerun 평균':>12} {'rerun p50':>11}")
+    for app in apps:
+        result = subprocess.run(
+            [sys.executable, __file__, "--child", "--app", app, "--reruns", str(args.reruns)],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(app)),
+        )
+        if result.returncode != 0:
+            print(f"{app:<40} 실패: {result.stderr.strip().splitlines()[-1:]}")
+            continue
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{app:<40} {data['cold_ms']:8.0f}ms {data['rerun_avg_ms']:10.1f}ms {data['rerun_p50_ms']:9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+# =========================
+# 부하 테스트용 가짜 OpenAI 서버 (실제 API 호출/비용 없음)
+# - POST /v1/chat/completions   : 일반 응답 + 스트리밍(SSE), json_schema 응답 형식이면 enum 안에서 골라 JSON
+# - POST /v1/images/generations : b64_json 또는 url (GET /files/<n>.png 로 다운로드)
+# - POST /v1/audio/transcriptions : 일반 응답 + 스트리밍(transcript.text.delta / done)
+# - POST /v1/embeddings         : 입력 해시로 만든 고정 벡터
+# 엔드포인트별 지연(±지터), 오류(500) 비율, 429 비율, 분당 요청 한도를 설정할 수 있음
+# 단독 실행: python benchmarks/mock_openai.py --port 8765 --speed 10
+#   앱에서 쓰려면 .streamlit/secrets.toml에 openai_base_url = "http://127.0.0.1:8765/v1"
+# =========================
+
+# 실제 API와 비슷한 평균 지연(초) → --speed로 나눠서 사용
+DEFAULT_LATENCY = {
+    "chat": 1.5,            # 전체 응답 (스트리밍이면 첫 토큰까지 30%)
+    "images": 10.0,
+    "transcription": 1.2,
+    "embeddings": 0.15,
+    "files": 0.05,
+}
+JITTER = 0.3                # 지연 ±30%
+IMAGE_POOL = 8              # 서로 다른 그림 몇 장을 돌려가며 사용 (프롬프트 해시로 선택)
+STREAM_CHUNKS = 12
+TRANSCRIPT = "바닷속을 헤엄치는 고래"
+
+
+def make_images(count, side):
+    # 미리 만든 잡음 섞인 PNG 몇 장 (실제 생성 이미지처럼 압축이 잘 안 되는 크기)
+    from PIL import Image
+
+    images = []
+    for seed in range(count):
+        rng = random.Random(seed)
+        base = Image.new("RGB", (side, side), tuple(rng.randrange(256) for _ in range(3)))
+        noise = Image.effect_noise((side, side), 40 + seed * 5).convert("RGB")
+        out = BytesIO()
+        Image.blend(base, noise, 0.5).save(out, format="PNG")
+        images.append(out.getvalue())
+    return images
+
+
+class MockOpenAI:
+    def __init__(self, host="127.0.0.1", port=0, speed=1.0, latency=None, error_rate=0.0, rate_limit_rate=0.0,
+                 rpm=None, image_side=1024, seed=0):
+        self.speed = max(speed, 1e-6)
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm = rpm or {}                # {"images": 50} 처럼 지정하면 넘는 요청은 429
+        self.images = make_images(IMAGE_POOL, image_side)
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows = {}
+        self.counters = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="mock-openai", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            counters = self.counters.setdefault(endpoint, {"requests": 0, "errors": 0, "rate_limited": 0})
+            counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(values) for name, values in self.counters.items()}
+
+    def delay(self, endpoint, share=1.0):
+        base = self.latency[endpoint] * share / self.speed
+        with self._lock:
+            factor = 1 + self.random.uniform(-JITTER, JITTER)
+        time.sleep(max(0.0, base * factor))
+
+    def fault(self, endpoint):
+        # → None(정상) 또는 (상태 코드, 추가 헤더, 메시지)
+        now = time.monotonic()
+        with self._lock:
+            limit = self.rpm.get(endpoint)
+            if limit:
+                window = self._windows.setdefault(endpoint, deque())
+                while window and now - window[0] > 60:
+                    window.popleft()
+                if len(window) >= limit:
+                    wait_ms = int((60 - (now - window[0])) * 1000) + 1
+                    return 429, {"retry-after-ms": str(wait_ms)}, "Rate limit reached for requests"
+                window.append(now)
+            roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return 429, {"retry-after-ms": str(int(1000 / self.speed))}, "Rate limit reached for requests"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500, {}, "The server had an error while processing your request."
+        return None
+
+    def image_for(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        return digest[0] % len(self.images)
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status, payload, headers=None):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _start_stream(self):
+                # 길이를 모르는 SSE 응답 → 다 보낸 뒤 연결을 닫아 끝을 알림
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+            def _event(self, payload):
+                text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+                self.wfile.write(f"data: {text}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+
+            def do_GET(self):
+                match = re.fullmatch(r"/files/(\d+)\.png", self.path)
+                if not match or int(match.group(1)) >= len(mock.images):
+                    self.send_error(404)
+                    return
+                mock._count("files", "requests")
+                mock.delay("files")
+                data = mock.images[int(match.group(1))]
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                routes = {
+                    "/v1/chat/completions": ("chat", self._chat),
+                    "/v1/images/generations": ("images", self._images),
+                    "/v1/audio/transcriptions": ("transcription", self._transcription),
+                    "/v1/embeddings": ("embeddings", self._embeddings),
+                }
+                endpoint, handle = routes.get(self.path.split("?")[0], (None, None))
+                if handle is None:
+                    self._body()
+                    self._json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+                body = self._body()
+                mock._count(endpoint, "requests")
+                fault = mock.fault(endpoint)
+                if fault is not None:
+                    status, headers, message = fault
+                    mock._count(endpoint, "rate_limited" if status == 429 else "errors")
+                    error_type = "requests" if status == 429 else "server_error"
+                    self._json(status, {"error": {"message": message, "type": error_type, "code": None}}, headers)
+                    return
+                handle(body)
+
+            def _chat(self, body):
+                request = json.loads(body)
+                content = self._chat_content(request)
+                base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": request.get("model", "mock")}
+                if not request.get("stream"):
+                    mock.delay("chat")
+                    self._json(200, dict(base, object="chat.completion", choices=[{
+                        "index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop",
+                    }], usage={"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}))
+                    return
+
+                mock.delay("chat", 0.3)
+                self._start_stream()
+                size = max(1, len(content) // STREAM_CHUNKS + 1)
+                for start in range(0, len(content), size):
+                    self._event(dict(base, object="chat.completion.chunk", choices=[{
+                        "index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None,
+                    }]))
+                    mock.delay("chat", 0.7 / STREAM_CHUNKS)
+                self._event(dict(base, object="chat.completion.chunk",
+                                 choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+                self._event("[DONE]")
+
+            def _chat_content(self, request):
+                text = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+                theme = re.search(r"Theme: (.*)", text)
+                theme = theme.group(1).strip() if theme else "a dream"
+                prompt = f"A vivid, detailed illustration of {theme}, soft light, rich texture, mock render."
+                response_format = request.get("response_format") or {}
+                if response_format.get("type") != "json_schema":
+                    return prompt
+                # 스키마의 enum 안에서 주제 해시로 골라 구조화 응답 흉내
+                properties = response_format["json_schema"]["schema"]["properties"]
+                digest = hashlib.sha256(theme.encode("utf-8")).digest()
+                result = {}
+                for index, (name, spec) in enumerate(properties.items()):
+                    choices = spec.get("enum") or spec.get("items", {}).get("enum")
+                    if not choices:
+                        result[name] = prompt
+                        continue
+                    value = choices[digest[index] % len(choices)]
+                    result[name] = [value] if spec.get("type") == "array" else value
+                return json.dumps(result, ensure_ascii=False)
+
+            def _images(self, body):
+                request = json.loads(body)
+                mock.delay("images")
+                index = mock.image_for(request.get("prompt", ""))
+                if request.get("response_format") == "b64_json":
+                    item = {"b64_json": base64.b64encode(mock.images[index]).decode("ascii")}
+                else:
+                    host, port = self.server.server_address[:2]
+                    item = {"url": f"http://{host}:{port}/files/{index}.png"}
+                item["revised_prompt"] = request.get("prompt", "")
+                self._json(200, {"created": int(time.time()), "data": [item]})
+
+            def _transcription(self, body):
+                streaming = re.search(rb'name="stream"\r\n\r\ntrue', body) is not None
+                if not streaming:
+                    mock.delay("transcription")
+                    self._json(200, {"text": TRANSCRIPT})
+                    return
+                mock.delay("transcription", 0.3)
+                self._start_stream()
+                words = TRANSCRIPT.split(" ")
+                for index, word in enumerate(words):
+                    delta = word if index == 0 else f" {word}"
+                    self._event({"type": "transcript.text.delta", "delta": delta})
+                    mock.delay("transcription", 0.7 / len(words))
+                self._event({"type": "transcript.text.done", "text": TRANSCRIPT})
+
+            def _embeddings(self, body):
+                request = json.loads(body)
+                mock.delay("embeddings")
+                inputs = request.get("input")
+                inputs = inputs if isinstance(inputs, list) else [inputs]
+                dimensions = int(request.get("dimensions") or 256)
+                data = []
+                for index, text in enumerate(inputs):
+                    rng = random.Random(hashlib.sha256(str(text).encode("utf-8")).digest())
+                    data.append({"object": "embedding", "index": index,
+                                 "embedding": [rng.gauss(0, 1) for _ in range(dimensions)]})
+                self._json(200, {"object": "list", "data": data, "model": request.get("model", "mock"),
+                                 "usage": {"prompt_tokens": 1, "total_tokens": 1}})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="부하 테스트용 가짜 OpenAI 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="지연을 이 배수만큼 빠르게 (10이면 1/10)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 오류 비율 (0~1)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="무작위 429 비율 (0~1)")
+    parser.add_argument("--images-rpm", type=int, help="이미지 분당 요청 한도 (넘으면 429)")
+    parser.add_argument("--image-side", type=int, default=1024)
+    args = parser.parse_args()
+
+    mock = MockOpenAI(args.host, args.port, speed=args.speed, error_rate=args.error_rate,
+                      rate_limit_rate=args.rate_limit_rate,
+                      rpm={"images": args.images_rpm} if args.images_rpm else None, image_side=args.image_side)
+    print(f"가짜 OpenAI 서버: {mock.base_url}  (Ctrl+C로 종료)")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(mock.stats(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
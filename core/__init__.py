@@ -0,0 +1,4 @@
+# =========================
+# 두 앱(app.py, app2.py)이 같이 쓰는 공용 모듈
+# 무거운 모듈을 미리 불러오지 않도록 여기서는 아무것도 import하지 않음
+# =========================
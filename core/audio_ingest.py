@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import openai
+
+from .tracing import span
+
+# =========================
+# 음성 녹음 → 음성 인식 입력 준비
+# 1) 녹음된 WebM/Opus를 그대로 전송 (변환 없음, 가장 작음)
+# 2) 변환이 꼭 필요하면 프로세스 안에서 PyAV로 16kHz 모노 FLAC 변환 (ffmpeg 프로세스 안 띄움)
+# 3) PyAV가 없으면 기존 pydub 경로 (필요할 때만 import)
+# =========================
+TARGET_RATE = 16000
+TRANSCRIBE_MODEL = "gpt-4o-mini-transcribe"
+
+
+def transcode_pyav(audio_bytes, rate=TARGET_RATE):
+    # 디코딩 → 16kHz 모노 리샘플 → FLAC 인코딩을 모두 메모리 안에서
+    import av
+
+    out = BytesIO()
+    with av.open(BytesIO(audio_bytes)) as src, av.open(out, mode="w", format="flac") as dst:
+        stream = dst.add_stream("flac", rate=rate, layout="mono")
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=rate)
+        for frame in src.decode(audio=0):
+            for resampled in resampler.resample(frame):
+                for packet in stream.encode(resampled):
+                    dst.mux(packet)
+        for resampled in resampler.resample(None):
+            for packet in stream.encode(resampled):
+                dst.mux(packet)
+        for packet in stream.encode(None):
+            dst.mux(packet)
+    return out.getvalue()
+
+
+def transcode_pydub(audio_bytes, rate=TARGET_RATE):
+    # PyAV가 없을 때의 예비 경로 (ffmpeg 실행), 그래도 16kHz 모노로 줄여서 업로드
+    from pydub import AudioSegment
+
+    segment = AudioSegment.from_file(BytesIO(audio_bytes), format="webm", codec="opus")
+    wav_buffer = BytesIO()
+    segment.set_frame_rate(rate).set_channels(1).export(wav_buffer, format="wav")
+    return wav_buffer.getvalue()
+
+
+def transcode(audio_bytes):
+    # → (파일 이름, 바이트, MIME)
+    try:
+        return "recorded.flac", transcode_pyav(audio_bytes), "audio/flac"
+    except ImportError:
+        return "recorded.wav", transcode_pydub(audio_bytes), "audio/wav"
+
+
+class AudioIngest:
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+    # direct_ok: 원본 WebM 전송이 되는지 (None=아직 모름 → 첫 전송 동안 변환을 미리 같이 돌려 둠)
+
+    def __init__(self, limiter, client, model=TRANSCRIBE_MODEL, stream=True):
+        self.limiter = limiter
+        self.client = client
+        self.model = model
+        self.stream = stream
+        self.direct_ok = None
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="audio-transcode")
+        self._lock = threading.Lock()
+        self.counters = {"direct": 0, "transcoded": 0, "upload_bytes": 0, "transcode_seconds": 0.0}
+
+    def _send(self, filename, data, mime, **kwargs):
+        with self._lock:
+            self.counters["upload_bytes"] += len(data)
+        return self.limiter.call(
+            "transcription",
+            self.client.audio.transcriptions.with_raw_response.create,
+            model=self.model,
+            file=(filename, data, mime),
+            **kwargs,
+        )
+
+    def _transcode(self, audio_bytes):
+        started = time.perf_counter()
+        with span("audio.transcode") as traced:
+            traced.bytes = len(audio_bytes)
+            result = transcode(audio_bytes)
+        with self._lock:
+            self.counters["transcoded"] += 1
+            self.counters["transcode_seconds"] += time.perf_counter() - started
+        return result
+
+    def _recognize(self, filename, data, mime, on_text, **kwargs):
+        with span("transcription") as traced:
+            traced.bytes = len(data)
+            if on_text is None or not self.stream:
+                return self._send(filename, data, mime, **kwargs).text.strip()
+            # 스트리밍 인식: 글자가 도착하는 대로 on_text(지금까지의 텍스트)
+            text = ""
+            for event in self._send(filename, data, mime, stream=True, **kwargs):
+                if event.type == "transcript.text.delta":
+                    text += event.delta
+                    on_text(text)
+                elif event.type == "transcript.text.done":
+                    text = event.text
+            return text.strip()
+
+    def transcribe(self, audio_bytes, on_text=None, **kwargs):
+        # 녹음 바이트 → 인식된 텍스트
+        speculative = None
+        if self.direct_ok is None:
+            speculative = self._pool.submit(self._transcode, audio_bytes)
+
+        if self.direct_ok is not False:
+            try:
+                text = self._recognize("recorded.webm", audio_bytes, "audio/webm", on_text, **kwargs)
+                self.direct_ok = True
+                with self._lock:
+                    self.counters["direct"] += 1
+                return text
+            except openai.BadRequestError as e:
+                # 형식을 받지 않는 모델/배포 → 이후로는 변환 경로 사용, 다른 400 오류는 그대로 전달
+                if "format" not in str(e).lower():
+                    raise
+                self.direct_ok = False
+
+        filename, data, mime = speculative.result() if speculative else self._transcode(audio_bytes)
+        return self._recognize(filename, data, mime, on_text, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, direct_ok=self.direct_ok)
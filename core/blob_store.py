@@ -0,0 +1,161 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# =========================
+# 이미지 바이트 공용 저장소
+# 세션에는 내용 해시(참조)만 두고, 실제 바이트는 여기 한 번만 저장
+# - 디스크: 해시 이름의 파일 (OS 페이지 캐시를 모든 세션이 공유), 한 번에 읽어 bytes 하나로
+# - RAM: 최근에 쓴 이미지 몇 장만 바이트로 보관 (크기 제한, LRU)
+# - pin(): 갤러리처럼 오래 가리키는 참조는 디스크 용량을 넘어도 지우지 않음
+# =========================
+DEFAULT_BLOB_DIR = Path(__file__).resolve().parent.parent / ".blobs"
+DEFAULT_RAM_BYTES = 64 * 1024 * 1024          # 64MB
+DEFAULT_DISK_BYTES = 2 * 1024 * 1024 * 1024   # 2GB
+
+
+def blob_ref(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+
+    def __init__(self, root=DEFAULT_BLOB_DIR, ram_bytes=DEFAULT_RAM_BYTES, disk_bytes=DEFAULT_DISK_BYTES):
+        self.root = Path(root)
+        self.ram_bytes = ram_bytes
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._ram = OrderedDict()    # ref -> bytes
+        self._ram_total = 0
+        self._disk = OrderedDict()   # ref -> 크기, 오래 안 쓴 순서
+        self._disk_total = 0
+        self._pinned = set()
+        self.ram_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _path(self, ref):
+        return self.root / ref[:2] / ref
+
+    def _load(self):
+        found = []
+        for path in self.root.glob("*/*"):
+            if path.suffix:
+                continue
+            try:
+                st_ = path.stat()
+            except OSError:
+                continue
+            found.append((st_.st_atime, path.name, st_.st_size))
+        for _, ref, size in sorted(found):
+            self._disk[ref] = size
+            self._disk_total += size
+
+    def _remember(self, ref, data):
+        # RAM 계층에 넣고 넘치면 오래 안 쓴 것부터 내림 (디스크에는 남아 있음)
+        if len(data) > self.ram_bytes:
+            return
+        if ref in self._ram:
+            self._ram.move_to_end(ref)
+            return
+        self._ram[ref] = data
+        self._ram_total += len(data)
+        while self._ram_total > self.ram_bytes:
+            _, old = self._ram.popitem(last=False)
+            self._ram_total -= len(old)
+
+    def _evict_disk(self):
+        # 오래 안 쓴 것부터 지우되 고정된 참조와 방금 쓴 것(맨 뒤)은 남김
+        for ref in list(self._disk)[:-1]:
+            if self._disk_total <= self.disk_bytes:
+                break
+            if ref in self._pinned:
+                continue
+            self._disk_total -= self._disk.pop(ref)
+            old = self._ram.pop(ref, None)
+            if old is not None:
+                self._ram_total -= len(old)
+            try:
+                self._path(ref).unlink()
+            except FileNotFoundError:
+                pass
+
+    def pin(self, refs):
+        # 디스크 정리 대상에서 제외 (프로세스가 다시 뜨면 가리키는 쪽에서 다시 고정)
+        with self._lock:
+            self._pinned.update(refs)
+
+    def exists(self, ref):
+        # 파일을 열지 않고 목록만 확인 (화면에서 다운로드 버튼을 보여줄지 정할 때)
+        with self._lock:
+            return bool(ref) and ref in self._disk
+
+    def put(self, data):
+        # 같은 내용은 같은 참조 → 여러 세션이 같은 이미지를 가져도 한 번만 저장
+        ref = blob_ref(data)
+        with self._lock:
+            if ref in self._disk:
+                self._disk.move_to_end(ref)
+                self._remember(ref, data)
+                return ref
+        path = self._path(ref)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if ref not in self._disk:
+                self._disk[ref] = len(data)
+                self._disk_total += len(data)
+            self._remember(ref, data)
+            self._evict_disk()
+        return ref
+
+    def get(self, ref):
+        # 참조 → 바이트, 지워졌거나 없는 참조면 None
+        if not ref:
+            return None
+        with self._lock:
+            data = self._ram.get(ref)
+            if data is not None:
+                self._ram.move_to_end(ref)
+                self._disk.move_to_end(ref)
+                self.ram_hits += 1
+                return data
+        path = self._path(ref)
+        # mmap 후 read()는 결국 전체를 새 bytes로 복사하므로 그냥 한 번에 읽음 (호출하는 쪽이 모두 bytes를 씀)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # 접근 시각 갱신 → 다시 시작할 때 오래 안 쓴 순서 복원용 (그 사이 다른 스레드가 지웠으면 생략)
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if ref in self._disk:
+                self._disk.move_to_end(ref)
+            self._remember(ref, data)
+            self.disk_hits += 1
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ram_entries": len(self._ram),
+                "ram_bytes": self._ram_total,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_total,
+                "pinned": len(self._pinned),
+                "ram_hits": self.ram_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,63 @@
+import hmac
+
+import streamlit as st
+
+from .tracing import get_tracer
+
+# =========================
+# 사이드바 디버그 패널 (secrets의 debug_panel = true, 또는 secrets의 debug_token과 같은 ?debug=<토큰>)
+# 모든 학생의 사용 기록이 보이므로 주소만 바꿔서는 열리지 않게 함
+# 모든 세션을 합친 단계별 소요 시간/바이트/재시도/캐시 적중 + 공용 자원 통계
+# 새로고침은 이 조각만 다시 실행 (st.fragment)
+# =========================
+
+
+def debug_enabled(setting):
+    if setting("debug_panel", False):
+        return True
+    token = setting("debug_token")
+    given = st.query_params.get("debug")
+    return bool(token) and given is not None and hmac.compare_digest(str(given), str(token))
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+@st.fragment
+def show_debug_panel(sources):
+    # sources: {"이름": 통계 dict를 돌려주는 함수} (이미 만들어진 공용 자원만 넘길 것)
+    tracer = get_tracer()
+    st.subheader("🛠️ 단계별 측정")
+    if st.button("🔄 새로고침", key="debug_refresh"):
+        st.rerun(scope="fragment")
+
+    rows = []
+    for stage, stats in tracer.summary().items():
+        hit_rate = stats["cache_hit_rate"]
+        rows.append({
+            "단계": stage,
+            "호출": stats["count"],
+            "p50 ms": _ms(stats["p50_seconds"]),
+            "p95 ms": _ms(stats["p95_seconds"]),
+            "p99 ms": _ms(stats["p99_seconds"]),
+            "KB": round(stats["bytes"] / 1024, 1),
+            "재시도": stats["retries"],
+            "오류": stats["errors"],
+            "캐시 적중": None if hit_rate is None else f"{hit_rate:.0%}",
+        })
+    if rows:
+        st.dataframe(rows, hide_index=True)
+    else:
+        st.caption("아직 기록된 단계가 없어요.")
+
+    with st.expander("최근 기록"):
+        st.dataframe(tracer.recent(30), hide_index=True)
+    with st.expander("공용 자원 통계"):
+        st.json({name: stats() for name, stats in sources.items()}, expanded=False)
+
+    cols = st.columns(2)
+    cols[0].download_button("metrics.json", data=tracer.as_json, file_name="metrics.json",
+                            mime="application/json", key="debug_json")
+    cols[1].download_button("metrics.prom", data=tracer.prometheus_text, file_name="metrics.prom",
+                            mime="text/plain", key="debug_prom")
@@ -0,0 +1,73 @@
+import threading
+from io import BytesIO
+
+from .tracing import span
+
+# =========================
+# 화면 표시용 미리보기 이미지
+# 화면에는 작은 WebP(또는 JPEG) 미리보기만 보내고,
+# 원본 PNG는 다운로드 버튼을 실제로 눌렀을 때만 전송
+# =========================
+PREVIEW_SIZES = {"small": 384, "medium": 768, "large": 1280}
+DEFAULT_PREVIEW = "medium"
+PREVIEW_FORMAT = "WEBP"
+PREVIEW_QUALITY = 80
+
+
+def make_preview(data, max_side, image_format=PREVIEW_FORMAT, quality=PREVIEW_QUALITY):
+    # 긴 변을 max_side로 줄이고 압축 포맷으로 다시 저장 (Pillow는 처음 쓸 때 import)
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = BytesIO()
+        if image_format == "WEBP":
+            image.save(out, format="WEBP", quality=quality, method=4)
+        else:
+            image.save(out, format=image_format, quality=quality, optimize=True)
+    return out.getvalue()
+
+
+class Previews:
+    # 원본 참조 + 크기 → 미리보기 참조 (미리보기 바이트도 BlobStore에 한 번만 저장)
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+
+    def __init__(self, blobs, image_format=PREVIEW_FORMAT, quality=PREVIEW_QUALITY):
+        self.blobs = blobs
+        self.image_format = image_format
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._refs = {}
+
+    def get(self, ref, size=DEFAULT_PREVIEW):
+        # 미리보기 바이트, 원본이 없으면 None
+        key = (ref, size)
+        with span("preview") as traced:
+            with self._lock:
+                preview_ref = self._refs.get(key)
+            if preview_ref is not None:
+                data = self.blobs.get(preview_ref)
+                if data is not None:
+                    traced.cache = "hit"
+                    traced.bytes = len(data)
+                    return data
+
+            traced.cache = "miss"
+            original = self.blobs.get(ref)
+            if original is None:
+                return None
+            data = make_preview(original, PREVIEW_SIZES[size], self.image_format, self.quality)
+            traced.bytes = len(data)
+            preview_ref = self.blobs.put(data)
+            with self._lock:
+                self._refs[key] = preview_ref
+            return data
+
+    def has_original(self, ref):
+        return self.blobs.exists(ref)
+
+    def original(self, ref):
+        # 다운로드 버튼에 넘길 지연 호출 함수 → 클릭했을 때만 원본 PNG를 읽어 전송
+        return lambda: self.blobs.get(ref) or b""
@@ -0,0 +1,232 @@
+import sqlite3
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+
+from .delivery import make_preview
+from .tracing import span
+
+# =========================
+# 지금까지 만든 그림 모음 (SQLite, WAL 모드)
+# - 생성마다 프롬프트/옵션/크기/시각/썸네일을 한 줄로 기록 (원본은 BlobStore 참조, 지워지지 않게 고정)
+# - 스타일/톤/분위기 필터는 인덱스, 주제+프롬프트 검색은 FTS5
+# - 페이지 넘김은 마지막으로 본 id 기준 (OFFSET 없이 몇 천 장이어도 일정한 속도)
+# - 지각 해시(dHash)가 거의 같은 그림은 다시 저장하지 않음
+# 읽기/쓰기는 스레드마다 연결을 따로 열어 사용 (WAL이라 읽기가 쓰기를 기다리지 않음)
+# =========================
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / ".gallery.db"
+THUMBNAIL_SIZE = 256
+DUPLICATE_DISTANCE = 3      # 해밍 거리 이하면 같은 그림으로 봄 (64비트를 16비트씩 4칸 → 3 이하는 한 칸이 반드시 같음)
+PAGE_SIZE = 12
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    repeats INTEGER NOT NULL DEFAULT 0,
+    app TEXT NOT NULL DEFAULT '',
+    theme TEXT NOT NULL DEFAULT '',
+    prompt TEXT NOT NULL,
+    style TEXT,
+    tone TEXT,
+    mood TEXT NOT NULL DEFAULT '',
+    viewpoint TEXT,
+    size TEXT,
+    image_ref TEXT NOT NULL,
+    phash INTEGER NOT NULL,
+    band0 INTEGER NOT NULL,
+    band1 INTEGER NOT NULL,
+    band2 INTEGER NOT NULL,
+    band3 INTEGER NOT NULL,
+    thumbnail BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_style ON generations (style, id);
+CREATE INDEX IF NOT EXISTS generations_tone ON generations (tone, id);
+CREATE INDEX IF NOT EXISTS generations_band0 ON generations (band0);
+CREATE INDEX IF NOT EXISTS generations_band1 ON generations (band1);
+CREATE INDEX IF NOT EXISTS generations_band2 ON generations (band2);
+CREATE INDEX IF NOT EXISTS generations_band3 ON generations (band3);
+
+CREATE TABLE IF NOT EXISTS generation_moods (
+    mood TEXT NOT NULL,
+    generation_id INTEGER NOT NULL REFERENCES generations (id) ON DELETE CASCADE,
+    PRIMARY KEY (mood, generation_id)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS generations_fts USING fts5 (
+    theme, prompt, content='generations', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS generations_fts_insert AFTER INSERT ON generations BEGIN
+    INSERT INTO generations_fts (rowid, theme, prompt) VALUES (new.id, new.theme, new.prompt);
+END;
+CREATE TRIGGER IF NOT EXISTS generations_fts_delete AFTER DELETE ON generations BEGIN
+    INSERT INTO generations_fts (generations_fts, rowid, theme, prompt) VALUES ('delete', old.id, old.theme, old.prompt);
+END;
+"""
+
+# 목록에 필요한 열만 (썸네일은 작은 WebP라 같이 읽어도 가벼움)
+LIST_COLUMNS = "id, created_at, repeats, app, theme, prompt, style, tone, mood, viewpoint, size, image_ref, thumbnail"
+
+
+def perceptual_hash(data):
+    # dHash: 9x8 흑백으로 줄여 옆 칸보다 밝은지 64비트로 기록 → 재압축/크기 변경에도 거의 같은 값
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        pixels = image.convert("L").resize((9, 8), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def _signed(value):
+    # SQLite INTEGER는 부호 있는 64비트
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _bands(value):
+    return [(value >> shift) & 0xFFFF for shift in (48, 32, 16, 0)]
+
+
+def referenced_refs(path=DEFAULT_DB_PATH):
+    # 갤러리 행이 가리키는 원본 참조 목록 (Gallery를 만들지 않고 읽기만, DB가 없으면 빈 목록)
+    # 공용 저장소를 만들 때 바로 고정하는 용도 → 어떤 순서로 저장해도 갤러리 원본이 지워지지 않음
+    path = Path(path)
+    if not path.exists():
+        return []
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        return [row[0] for row in conn.execute("SELECT DISTINCT image_ref FROM generations")]
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def _fts_query(text):
+    # 단어마다 접두어 검색 ("바다" → "바다에서"도 찾음), 따옴표는 제거
+    terms = [term.replace('"', "") for term in text.split()]
+    return " AND ".join(f'"{term}"*' for term in terms if term)
+
+
+class Gallery:
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+
+    def __init__(self, blobs, path=DEFAULT_DB_PATH, duplicate_distance=DUPLICATE_DISTANCE):
+        self.blobs = blobs
+        self.path = Path(path)
+        self.duplicate_distance = duplicate_distance
+        self.added = 0
+        self.duplicates = 0
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # 갤러리에 남아 있는 그림의 원본은 공용 저장소가 용량 정리로 지우지 않도록 고정
+            self.blobs.pin(row[0] for row in conn.execute("SELECT DISTINCT image_ref FROM generations"))
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _find_duplicate(self, conn, phash):
+        bands = _bands(phash)
+        candidates = conn.execute(
+            "SELECT id, phash FROM generations WHERE band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?", bands
+        ).fetchall()
+        for row in candidates:
+            if bin((row["phash"] & ((1 << 64) - 1)) ^ phash).count("1") <= self.duplicate_distance:
+                return row["id"]
+        return None
+
+    def record(self, ref, prompt, theme="", app="", style=None, tone=None, mood=(), viewpoint=None, size=None,
+               data=None):
+        # 생성된 그림 하나 기록 → 갤러리 id (거의 같은 그림이 이미 있으면 그 id)
+        # 작업 스레드에서 부르는 용도 (썸네일/해시 계산이 화면을 막지 않도록)
+        with span("gallery.record") as traced:
+            return self._record(traced, ref, prompt, theme, app, style, tone, mood, viewpoint, size, data)
+
+    def _record(self, traced, ref, prompt, theme, app, style, tone, mood, viewpoint, size, data):
+        data = data if data is not None else self.blobs.get(ref)
+        if data is None:
+            return None
+        traced.bytes = len(data)
+        phash = perceptual_hash(data)
+        now = time.time()
+        conn = self._connect()
+        with self._write_lock, conn:
+            existing = self._find_duplicate(conn, phash)
+            if existing is not None:
+                conn.execute(
+                    "UPDATE generations SET repeats = repeats + 1, last_seen = ? WHERE id = ?", (now, existing)
+                )
+                self.duplicates += 1
+                traced.cache = "hit"
+                return existing
+            moods = list(mood) if isinstance(mood, (list, tuple)) else [mood] if mood else []
+            cursor = conn.execute(
+                "INSERT INTO generations (created_at, last_seen, app, theme, prompt, style, tone, mood, viewpoint,"
+                " size, image_ref, phash, band0, band1, band2, band3, thumbnail)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now, now, app, theme or "", prompt, style, tone, ", ".join(moods), viewpoint, size, ref,
+                 _signed(phash), *_bands(phash), make_preview(data, THUMBNAIL_SIZE)),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO generation_moods (mood, generation_id) VALUES (?, ?)",
+                [(m, cursor.lastrowid) for m in moods],
+            )
+            # 행이 생긴 원본만 고정 (거의 같은 그림으로 합쳐진 쪽은 보통처럼 용량 정리 대상)
+            self.blobs.pin([ref])
+            self.added += 1
+            traced.cache = "miss"
+            return cursor.lastrowid
+
+    def page(self, before=None, limit=PAGE_SIZE, style=None, tone=None, mood=None, query=None):
+        # 최신순 한 페이지 → (항목 목록, 다음 페이지 커서 또는 None)
+        # before: 이전 페이지 마지막 항목의 id (처음 페이지는 None)
+        clauses, params = [], []
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(before)
+        if style:
+            clauses.append("style = ?")
+            params.append(style)
+        if tone:
+            clauses.append("tone = ?")
+            params.append(tone)
+        if mood:
+            clauses.append("id IN (SELECT generation_id FROM generation_moods WHERE mood = ?)")
+            params.append(mood)
+        match = _fts_query(query) if query else ""
+        if match:
+            clauses.append("id IN (SELECT rowid FROM generations_fts WHERE generations_fts MATCH ?)")
+            params.append(match)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT {LIST_COLUMNS} FROM generations {where} ORDER BY id DESC LIMIT ?", (*params, limit + 1)
+        ).fetchall()
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return items, next_cursor
+
+    def get(self, generation_id):
+        row = self._connect().execute(
+            f"SELECT {LIST_COLUMNS} FROM generations WHERE id = ?", (generation_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def stats(self):
+        total = self._connect().execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+        return {"entries": total, "added": self.added, "duplicates": self.duplicates}
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import streamlit as st
+
+# =========================
+# 지난 작품 모아보기 (두 앱 공통 화면 조각)
+# 필터/페이지 이동은 이 조각만 다시 실행 (st.fragment) → 앱 전체가 다시 그려지지 않음
+# =========================
+GRID_COLUMNS = 4
+ALL = "전체"
+
+
+def _reset_on_change(key, filters):
+    # 필터가 바뀌면 첫 페이지부터
+    if st.session_state.get(f"{key}_filters") != filters:
+        st.session_state[f"{key}_filters"] = filters
+        st.session_state[f"{key}_cursors"] = []
+
+
+@st.fragment
+def show_gallery(gallery, previews, options, key="gallery"):
+    query = st.text_input("🔎 주제/프롬프트 검색", key=f"{key}_query", placeholder="예: 바다 고양이")
+    cols = st.columns(3)
+    style = cols[0].selectbox("🎨 스타일", (ALL, *options["style"]), key=f"{key}_style")
+    tone = cols[1].selectbox("🎨 색상 톤", (ALL, *options["tone"]), key=f"{key}_tone")
+    mood = cols[2].selectbox("💫 분위기", (ALL, *options["mood"]), key=f"{key}_mood")
+    filters = (query.strip(), style, tone, mood)
+    _reset_on_change(key, filters)
+
+    # 커서 스택: 지금까지 넘긴 페이지들의 시작 커서 (비어 있으면 첫 페이지)
+    cursors = st.session_state.setdefault(f"{key}_cursors", [])
+    items, next_cursor = gallery.page(
+        before=cursors[-1] if cursors else None,
+        style=None if style == ALL else style,
+        tone=None if tone == ALL else tone,
+        mood=None if mood == ALL else mood,
+        query=filters[0] or None,
+    )
+    if not items:
+        st.info("아직 기록된 그림이 없어요." if filters == ("", ALL, ALL, ALL) else "조건에 맞는 그림이 없어요.")
+        return
+
+    grid = st.columns(GRID_COLUMNS)
+    for index, item in enumerate(items):
+        with grid[index % GRID_COLUMNS]:
+            created = datetime.fromtimestamp(item["created_at"]).strftime("%m/%d %H:%M")
+            st.image(item["thumbnail"], caption=f"{item['theme'] or '(주제 없음)'} · {created}")
+            with st.popover("📝 자세히"):
+                st.markdown(f"**🎨 스타일**: {item['style'] or '-'} · **🎨 색감**: {item['tone'] or '-'}")
+                st.markdown(f"**💫 분위기**: {item['mood'] or '-'} · **📷 시점**: {item['viewpoint'] or '-'}")
+                st.caption(item["prompt"])
+                # 원본이 지워진 그림은 빈 파일을 내려받지 않도록 버튼을 끔
+                available = previews.has_original(item["image_ref"])
+                st.download_button(
+                    label=f"📥 원본 다운로드 ({item['size'] or '-'})" if available else "📥 원본이 지워졌어요",
+                    data=previews.original(item["image_ref"]) if available else b"",
+                    file_name=f"my_art_box_{item['id']}.png",
+                    mime="image/png",
+                    key=f"{key}_download_{item['id']}",
+                    disabled=not available,
+                )
+
+    prev_col, _, next_col = st.columns([1, 3, 1])
+    if cursors and prev_col.button("◀ 이전", key=f"{key}_prev"):
+        cursors.pop()
+        st.rerun(scope="fragment")
+    if next_cursor is not None and next_col.button("다음 ▶", key=f"{key}_next"):
+        cursors.append(next_cursor)
+        st.rerun(scope="fragment")
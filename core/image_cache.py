@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+from .blob_store import BlobStore
+
+# =========================
+# 생성 이미지 디스크 캐시
+# (모델, 프롬프트, 크기[, 변형 번호]) → BlobStore 참조 → PNG 바이트
+# 바이트는 BlobStore에만 한 번 저장하고 여기에는 참조만 둠
+# → 디스크 사본도 용량 한도도 하나 (BlobStore가 지운 그림은 캐시 미스)
+# =========================
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".image_cache"
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60     # 7일
+
+
+def normalize_prompt(prompt):
+    # 유니코드 정규화 + 연속 공백 정리 → 같은 문장은 같은 키
+    return " ".join(unicodedata.normalize("NFC", prompt).split())
+
+
+def cache_key(model, prompt, size, variant=0):
+    # 같은 프롬프트로 여러 장 만들 때는 변형 번호로 구분 (0번은 기존 키 그대로)
+    raw = f"{model}\n{size}\n{normalize_prompt(prompt)}"
+    if variant:
+        raw += f"\n#{variant}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+    # 키마다 참조 파일(<key>.ref) 하나, 파일 mtime = 저장 시각(TTL 기준)
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL_SECONDS, blobs=None):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.blobs = blobs if blobs is not None else BlobStore()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> (참조, 저장 시각)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.ref"
+
+    def _load(self):
+        # 재시작 후에도 기존 참조를 그대로 이어서 사용
+        for path in self.root.glob("*/*.png"):
+            self._migrate(path)
+        now = time.time()
+        for path in self.root.glob("*/*.ref"):
+            try:
+                created = path.stat().st_mtime
+                ref = path.read_text(encoding="ascii").strip()
+            except (OSError, ValueError):
+                continue
+            if now - created > self.ttl or not self.blobs.exists(ref):
+                self._unlink(path)
+                self.evictions += 1
+                continue
+            self._entries[path.stem] = (ref, created)
+
+    def _migrate(self, path):
+        # 예전 형식(키마다 PNG 사본)은 BlobStore로 옮기고 참조만 남김 (저장 시각 유지)
+        try:
+            created = path.stat().st_mtime
+            ref = self.blobs.put(path.read_bytes())
+        except OSError:
+            return
+        self._write_ref(path.stem, ref, created)
+        self._unlink(path)
+
+    def _write_ref(self, key, ref, created=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 임시 파일에 쓴 뒤 교체 → 다른 세션이 반쯤 쓰인 파일을 읽지 않도록
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(ref, encoding="ascii")
+        if created is not None:
+            os.utime(tmp, (created, created))
+        os.replace(tmp, path)
+
+    def _unlink(self, path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        self._unlink(self._path(key))
+        self.evictions += 1
+        self.misses += 1
+
+    def get(self, model, prompt, size, variant=0):
+        key = cache_key(model, prompt, size, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if time.time() - entry[1] > self.ttl:
+                self._drop(key)
+                return None
+        data = self.blobs.get(entry[0])
+        with self._lock:
+            if data is None:
+                # BlobStore 용량 정리로 지워진 그림
+                if self._entries.get(key) == entry:
+                    self._drop(key)
+                else:
+                    self.misses += 1
+                return None
+            self.hits += 1
+        return data
+
+    def put(self, model, prompt, size, data, variant=0):
+        # → BlobStore 참조 (같은 바이트를 다시 put해도 파일은 한 번만 씀)
+        key = cache_key(model, prompt, size, variant)
+        ref = self.blobs.put(data)
+        self._write_ref(key, ref)
+        with self._lock:
+            self._entries[key] = (ref, time.time())
+        return ref
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
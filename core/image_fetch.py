@@ -0,0 +1,84 @@
+import binascii
+from io import BytesIO
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .tracing import span
+
+# =========================
+# 생성된 이미지 받아오기
+# - "b64": response_format="b64_json" → 생성 응답 한 번에 이미지까지 받음 (추가 요청 없음)
+# - "url": 기존처럼 URL로 받되, 연결을 재사용하는 세션 + 타임아웃 + 조각 단위 스트리밍
+# 배포마다 secrets의 image_fetch_mode로 선택
+# =========================
+MODES = ("b64", "url")
+DEFAULT_MODE = "b64"
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+CHUNK_SIZE = 256 * 1024
+
+
+def make_http_session(pool_size=16):
+    # 프로세스 전체에서 하나만 만들어 keep-alive 연결을 모든 세션이 재사용
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504)),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def download(session, url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), chunk_size=CHUNK_SIZE):
+    # 응답 전체를 한 번에 버퍼링하지 않고 조각씩 받아 BytesIO 하나에만 쌓음
+    with session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        buffer = BytesIO()
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            buffer.write(chunk)
+    # BytesIO.getvalue()는 추가 복사 없이 내부 버퍼를 그대로 넘겨줌
+    return buffer.getvalue()
+
+
+def decode_b64(b64_text):
+    # C 구현으로 한 번에 디코딩 → 결과 버퍼 하나만 생성
+    # (파이썬에서 조각 단위로 나누면 조각마다 중간 bytes가 생겨 오히려 복사가 늘어남)
+    return binascii.a2b_base64(b64_text)
+
+
+def fetch_image(limiter, client, session, model, prompt, size, mode=DEFAULT_MODE, **extra):
+    # 이미지 생성 + 바이트 받아오기 → (PNG 바이트, URL 또는 None)
+    if mode not in MODES:
+        raise ValueError(f"알 수 없는 이미지 수신 방식: {mode}")
+
+    if mode == "b64":
+        with span("images.generate") as traced:
+            response = limiter.call(
+                "images",
+                client.images.with_raw_response.generate,
+                model=model,
+                prompt=prompt,
+                size=size,
+                response_format="b64_json",
+                **extra,
+            )
+            item = response.data[0]
+            data = decode_b64(item.b64_json)
+            # 디코딩이 끝난 base64 문자열은 바로 놓아서 응답 객체가 큰 문자열을 붙잡지 않도록
+            item.b64_json = None
+            traced.bytes = len(data)
+        return data, None
+
+    with span("images.generate"):
+        response = limiter.call(
+            "images", client.images.with_raw_response.generate, model=model, prompt=prompt, size=size, **extra
+        )
+        image_url = response.data[0].url
+    with span("image.download") as traced:
+        data = download(session, image_url)
+        traced.bytes = len(data)
+    return data, image_url
@@ -0,0 +1,108 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .tracing import observe, span
+
+# =========================
+# 백그라운드 작업 실행기
+# 이미지 생성처럼 오래 걸리는 일을 스크립트 스레드 밖에서 실행하고
+# 화면은 작업 ID로 상태만 가볍게 확인 (st.fragment 폴링)
+# =========================
+DEFAULT_MAX_WORKERS = 4            # 동시에 실행할 최대 작업 수 (프로세스 전체)
+DEFAULT_KEEP_SECONDS = 30 * 60     # 끝난 작업 결과 보관 시간
+POLL_SECONDS = 0.5                 # 화면이 작업 상태를 확인하는 간격 (두 앱 공통, 음성 인식 중간 결과도 이 간격으로 갱신)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, job_id, label):
+        self.id = job_id
+        self.label = label
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "대기 중..."
+        self.result = None
+        self.error = None
+        self.detail = {}       # 단계별 중간 결과 (인식된 텍스트, 프롬프트, 단계별 소요 시간 등)
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def report(self, progress, message=None):
+        # 작업 함수가 진행률(0~1)과 안내 문구를 알려줄 때 사용
+        self.progress = max(0.0, min(1.0, progress))
+        if message:
+            self.message = message
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+
+class JobQueue:
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, keep_seconds=DEFAULT_KEEP_SECONDS):
+        self.max_workers = max_workers
+        self.keep_seconds = keep_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, fn, *args, label="", **kwargs):
+        # fn(job, *args, **kwargs) 형태로 호출 → job.report()로 진행률 갱신 가능
+        job = Job(uuid.uuid4().hex, label)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started = time.time()
+        job.message = "실행 중..."
+        # 대기열에서 기다린 시간 (동시 실행 수가 모자라면 여기가 길어짐)
+        observe("job.queue_wait", job.started - job.created)
+        try:
+            with span(f"job.{fn.__name__}"):
+                job.result = fn(job, *args, **kwargs)
+            job.status = DONE
+            job.progress = 1.0
+            job.message = "완료"
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+            job.message = f"실패: {e}"
+        finally:
+            job.finished = time.time()
+
+    def _prune(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished is not None and now - job.finished > self.keep_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "max_workers": self.max_workers,
+            "queued": sum(job.status == QUEUED for job in jobs),
+            "running": sum(job.status == RUNNING for job in jobs),
+            "done": sum(job.status == DONE for job in jobs),
+            "failed": sum(job.status == FAILED for job in jobs),
+        }
@@ -0,0 +1,45 @@
+from .image_fetch import DEFAULT_MODE, fetch_image
+from .tracing import span
+
+# =========================
+# Streamlit 없이 쓰는 OpenAI 호출 (앱은 services가 공용 자원을 넣어 부르고, batch.py는 직접 부름)
+# - 모델 이름
+# - chat 응답 텍스트 (속도 제한/재시도 포함)
+# - 이미지: 디스크 캐시 확인 → 없으면 생성 후 캐시에 저장
+# =========================
+IMAGE_MODEL = "dall-e-3"
+CHAT_MODEL = "gpt-4o"
+
+
+def chat_text(limiter, client, messages, model=CHAT_MODEL, hedge_after=None, **kwargs):
+    with span("chat") as traced:
+        response = limiter.call(
+            "chat",
+            client.chat.completions.with_raw_response.create,
+            hedge_after=hedge_after,
+            model=model,
+            messages=messages,
+            **kwargs,
+        )
+        text = response.choices[0].message.content.strip()
+        traced.bytes = len(text.encode("utf-8"))
+    return text
+
+
+def cached_image(cache, limiter, client, session, prompt, size, model=IMAGE_MODEL, mode=DEFAULT_MODE, variant=0,
+                 around=None):
+    # → (PNG 바이트, URL 또는 None, 캐시 적중 여부)
+    # around(fetch): 실제 생성을 감쌀 함수 (앱은 동일 요청 합치기 + 동시 호출 수 제한에 사용)
+    with span("image.cache") as traced:
+        data = cache.get(model, prompt, size, variant)
+        traced.cache = "miss" if data is None else "hit"
+    if data is not None:
+        return data, None, True
+
+    def fetch():
+        data, image_url = fetch_image(limiter, client, session, model, prompt, size, mode=mode, n=1)
+        cache.put(model, prompt, size, data, variant)
+        return data, image_url
+
+    data, image_url = around(fetch) if around is not None else fetch()
+    return data, image_url, False
@@ -0,0 +1,81 @@
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import pytz
+import streamlit as st
+
+# =========================
+# 페이지 공통 설정 (사용 기한, 페이지 설정, 버튼 스타일)
+# =========================
+CLOSED_MESSAGE = "⛔ 앱 사용시간이 종료되었습니다! 감사합니다💕"
+
+# 🎨 버튼 색상 스타일 (연한 민트 + 굵은 글씨), 앱마다 원래 쓰던 그대로
+# Streamlit은 다시 실행될 때마다 화면 요소를 새로 보내야 하므로 문자열만 미리 만들어 둠
+APP_BUTTON_CSS = """
+<style>
+div.stButton > button:first-child,
+div.stDownloadButton > button:first-child {
+    background-color: #A8E6CF !important;
+    color: #004D40 !important;
+    font-weight: 900 !important;
+    font-size: 1.05rem !important;
+    border: none !important;
+    border-radius: 10px !important;
+    padding: 0.6em 1.2em !important;
+    transition: all 0.25s ease-in-out !important;
+    box-shadow: 0px 3px 8px rgba(0,0,0,0.08);
+}
+div.stButton > button:hover,
+div.stDownloadButton > button:hover {
+    background-color: #C8F7E6 !important;
+    color: #002C25 !important;
+    transform: scale(1.03);
+}
+</style>
+"""
+
+# app2는 폼 제출 버튼과 글꼴까지 지정
+APP2_BUTTON_CSS = """
+<style>
+div.stButton > button:first-child,
+div.stDownloadButton > button:first-child,
+div.stFormSubmitButton > button:first-child {
+    background-color: #A8E6CF !important;   /* 연한 민트 */
+    color: #004D40 !important;              /* 진한 청록 글자색 */
+    font-family: "Noto Sans KR", "Pretendard", sans-serif !important;
+    font-weight: 900 !important;            /* 아주 굵게 */
+    font-size: 1.05rem !important;          /* 살짝 크게 */
+    border: none !important;
+    border-radius: 10px !important;
+    padding: 0.6em 1.2em !important;
+    transition: all 0.25s ease-in-out !important;
+    box-shadow: 0px 3px 8px rgba(0,0,0,0.08);
+}
+div.stButton > button:hover,
+div.stDownloadButton > button:hover,
+div.stFormSubmitButton > button:hover {
+    background-color: #C8F7E6 !important;   /* hover 시 더 밝은 민트 */
+    color: #002C25 !important;
+    transform: scale(1.03);
+}
+</style>
+"""
+
+
+@lru_cache(maxsize=8)
+def cutoff_timestamp(cutoff):
+    # "YYYY-MM-DD HH:MM:SS" (한국 시간) → epoch 초, 처음 한 번만 계산
+    korea = pytz.timezone("Asia/Seoul")
+    return korea.localize(datetime.strptime(cutoff, "%Y-%m-%d %H:%M:%S")).timestamp()
+
+
+def setup_page(title, cutoff, css):
+    # 사용 기한은 secrets의 cutoff로 덮어쓸 수 있음 (코드 수정 없이 연장)
+    if time.time() > cutoff_timestamp(st.secrets.get("cutoff", cutoff)):
+        st.error(CLOSED_MESSAGE)
+        st.stop()
+
+    st.set_page_config(page_title="나의 그림상자 (Drawing Assistant)", layout="wide")
+    st.title(title)
+    st.markdown(css, unsafe_allow_html=True)
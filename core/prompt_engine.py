@@ -0,0 +1,218 @@
+import json
+
+from .tracing import span
+
+# =========================
+# 프롬프트 생성 엔진
+# - "structured": 시각 요소 추천 + 영어 프롬프트를 JSON 스키마 응답 한 번으로 받기
+# - "two_step": 기존 방식 (추천 호출 → 프롬프트 호출, 두 번)
+# chat(messages, **kwargs) → 응답 텍스트
+# chat_stream(messages, **kwargs) → 응답 텍스트 조각을 차례로 내보내는 제너레이터
+# memo: 비슷한 주제의 추천을 재사용하는 캐시 (lookup(주제) / store(주제, 추천))
+#       "two_step"에서만 사용 — "structured"는 추천과 프롬프트가 한 호출이라 적중해도 chat 호출이 줄지 않음
+# =========================
+MODES = ("structured", "two_step")
+ATTRIBUTES = ("style", "tone", "mood", "viewpoint")
+
+
+def _response_schema(options):
+    # 추천 값은 옵션 목록 안에서만 고르도록 enum으로 제한
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "dalle_prompt",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "style": {"type": "string", "enum": options["style"]},
+                    "tone": {"type": "string", "enum": options["tone"]},
+                    "mood": {"type": "array", "items": {"type": "string", "enum": options["mood"]}},
+                    "viewpoint": {"type": "string", "enum": options["viewpoint"]},
+                    "prompt": {"type": "string"},
+                },
+                "required": ["style", "tone", "mood", "viewpoint", "prompt"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def validate_attributes(suggested, selection, options):
+    # 옵션 목록에 없는 값은 버리고 사용자가 고른 값 유지
+    result = dict(selection)
+    for name in ("style", "tone", "viewpoint"):
+        value = suggested.get(name)
+        if isinstance(value, str) and value.strip() in options[name]:
+            result[name] = value.strip()
+    mood = suggested.get("mood")
+    if isinstance(mood, str):
+        mood = mood.split(",")
+    if isinstance(mood, list):
+        valid = [m.strip() for m in mood if isinstance(m, str) and m.strip() in options["mood"]]
+        if valid:
+            result["mood"] = valid
+    return result
+
+
+def partial_json_string(buffer, field):
+    # 아직 다 오지 않은 JSON에서 문자열 필드의 지금까지 내용만 꺼내기
+    marker = buffer.find(f'"{field}"')
+    if marker < 0:
+        return ""
+    colon = buffer.find(":", marker + len(field) + 2)
+    start = buffer.find('"', colon + 1) if colon >= 0 else -1
+    if start < 0:
+        return ""
+    raw = buffer[start + 1:]
+    escaped = False
+    for i, ch in enumerate(raw):
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            raw = raw[:i]
+            break
+    # 끝에 잘린 이스케이프(\, \u12 등)는 다음 조각이 올 때까지 보류
+    for cut in range(0, 7):
+        try:
+            return json.loads(f'"{raw[:len(raw) - cut]}"')
+        except json.JSONDecodeError:
+            continue
+    return ""
+
+
+def template_prompt(theme, selection):
+    # app.py 수동 생성 문장 틀 (API 호출 없이 고른 값을 그대로 넣음)
+    return (
+        f"A {selection['tone']} {selection['style']} artwork expressing {', '.join(selection['mood'])} mood, "
+        f"viewed from {selection['viewpoint']}, themed '{theme}'."
+    )
+
+
+def _stream_text(chat_stream, messages, on_text, field=None, **kwargs):
+    # 조각이 올 때마다 on_text(지금까지의 텍스트) 호출, 전체 응답 문자열 반환
+    buffer = ""
+    shown = ""
+    for delta in chat_stream(messages, **kwargs):
+        buffer += delta
+        text = partial_json_string(buffer, field) if field else buffer
+        if text and text != shown:
+            shown = text
+            on_text(text)
+    return buffer
+
+
+def _prompt_request(theme, attributes, translate):
+    style_eng, tone_eng, mood_eng, viewpoint_eng = translate(
+        attributes["style"], attributes["tone"], attributes["mood"], attributes["viewpoint"]
+    )
+    return f"""
+Create a vivid English image prompt for DALL·E 3.
+Theme: {theme}
+Style: {style_eng}
+Color tone: {tone_eng}
+Mood: {mood_eng}
+Viewpoint: {viewpoint_eng}
+Only return the prompt.
+"""
+
+
+def _suggest_two_step(chat, theme, selection, options):
+    instruction = f"""
+You are a creative assistant. Based on the theme, suggest:
+Style, Color tone, Mood(s), and Viewpoint (in Korean).
+Theme: {theme}
+Format:
+Style: ...
+Color tone: ...
+Mood: ...
+Viewpoint: ...
+"""
+    response_text = chat([{"role": "user", "content": instruction}])
+    suggested = {}
+    for line in response_text.splitlines():
+        if line.startswith("Style:"):
+            suggested["style"] = line.split(":", 1)[1].strip()
+        elif line.startswith("Color tone:"):
+            suggested["tone"] = line.split(":", 1)[1].strip()
+        elif line.startswith("Mood:"):
+            suggested["mood"] = [m.strip() for m in line.split(":", 1)[1].split(",")]
+        elif line.startswith("Viewpoint:"):
+            suggested["viewpoint"] = line.split(":", 1)[1].strip()
+    return validate_attributes(suggested, selection, options)
+
+
+def _build_structured(chat, theme, selection, options, chat_stream=None, on_text=None):
+    listing = "\n".join(f"{name}: {', '.join(options[name])}" for name in ATTRIBUTES)
+    instruction = f"""
+You are a creative assistant. Based on the theme, choose a Style, Color tone (tone),
+one or more Moods and a Viewpoint from the Korean options below, then write a vivid
+English image prompt for DALL·E 3 that reflects the theme and your choices.
+Theme: {theme}
+Options:
+{listing}
+"""
+    messages = [{"role": "user", "content": instruction}]
+    if chat_stream is not None and on_text is not None:
+        # "prompt"는 스키마 마지막 필드 → 시각 요소가 먼저 오고 프롬프트가 이어서 흘러나옴
+        response_text = _stream_text(
+            chat_stream, messages, on_text, field="prompt", response_format=_response_schema(options)
+        )
+    else:
+        response_text = chat(messages, response_format=_response_schema(options))
+    data = json.loads(response_text)
+    result = validate_attributes(data, selection, options)
+    result["prompt"] = str(data.get("prompt", "")).strip()[:1000]
+    return result
+
+
+def _remember(memo, theme, attributes):
+    if memo is not None:
+        memo.store(theme, {name: attributes[name] for name in ATTRIBUTES})
+
+
+def build_prompt(chat, theme, selection, options, translate, use_ai=True, mode="structured",
+                 chat_stream=None, on_text=None, memo=None):
+    # selection: 사용자가 고른 {"style", "tone", "mood", "viewpoint"}
+    # chat_stream + on_text를 주면 프롬프트를 만드는 호출을 스트리밍으로 받아 조각마다 on_text 호출
+    # 반환: 최종 시각 요소 + "prompt"
+    if mode not in MODES:
+        raise ValueError(f"알 수 없는 프롬프트 모드: {mode}")
+
+    if mode != "two_step":
+        # 임베딩 호출 비용만 늘고 아낄 chat 호출이 없으므로 캐시를 쓰지 않음
+        memo = None
+    remembered = None
+    if use_ai and memo is not None:
+        with span("suggestion.lookup") as traced:
+            remembered = memo.lookup(theme)
+            traced.cache = "miss" if remembered is None else "hit"
+    if remembered is not None:
+        # 비슷한 주제의 추천이 있으면 추천 호출은 건너뛰고 프롬프트만 생성
+        attributes = validate_attributes(remembered, selection, options)
+    elif use_ai and mode == "structured":
+        try:
+            result = _build_structured(chat, theme, selection, options, chat_stream, on_text)
+            if result["prompt"]:
+                _remember(memo, theme, result)
+                return result
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            pass
+        # 구조화 응답이 깨졌으면 기존 두 단계 방식으로 대체
+        attributes = _suggest_two_step(chat, theme, selection, options)
+        _remember(memo, theme, attributes)
+    elif use_ai:
+        attributes = _suggest_two_step(chat, theme, selection, options)
+        _remember(memo, theme, attributes)
+    else:
+        attributes = dict(selection)
+
+    messages = [{"role": "user", "content": _prompt_request(theme, attributes, translate)}]
+    if chat_stream is not None and on_text is not None:
+        prompt = _stream_text(chat_stream, messages, on_text).strip()
+    else:
+        prompt = chat(messages)
+    attributes["prompt"] = prompt[:1000]
+    return attributes
@@ -0,0 +1,227 @@
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import openai
+
+from .tracing import add_retry
+
+# =========================
+# OpenAI 호출 속도 제한 + 재시도
+# - 엔드포인트(images / chat / transcription / embeddings)마다 토큰 버킷 하나씩, 모든 세션이 공유
+# - 응답 헤더(x-ratelimit-*)를 보고 속도를 맞춤
+# - 429 / 5xx / 타임아웃은 지터가 들어간 지수 백오프로 마감 시간 안에서 재시도
+# - 느린 chat 호출은 선택적으로 한 번 더 보내(헤징) 먼저 온 응답 사용
+# =========================
+DEFAULT_RPM = {"images": 50, "chat": 500, "transcription": 50, "embeddings": 500}
+DEFAULT_DEADLINE = 120.0      # 재시도 포함 전체 마감 시간(초)
+DEFAULT_MAX_ATTEMPTS = 5
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 20.0
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value):
+    # "1s", "6m0s", "20ms" 같은 헤더 값 → 초
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    matches = _DURATION_RE.findall(value)
+    if not matches:
+        return None
+    return sum(float(n) * _UNIT_SECONDS[unit] for n, unit in matches)
+
+
+def _is_retryable(error):
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    return parse_duration(response.headers.get("retry-after"))
+
+
+class TokenBucket:
+    def __init__(self, rpm):
+        self._lock = threading.Lock()
+        self.set_rate(rpm)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        # 대기열/지연 통계
+        self.waiting = 0
+        self.max_waiting = 0
+        self.throttled_seconds = 0.0
+
+    def set_rate(self, rpm):
+        self.rpm = max(1, rpm)
+        self.rate = self.rpm / 60.0
+        self.capacity = max(1.0, self.rpm / 10.0)
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, deadline):
+        # 토큰이 생길 때까지 기다림, 마감 시간을 넘기면 TimeoutError
+        started = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now >= self.paused_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+                if now + delay > deadline:
+                    raise TimeoutError("OpenAI 요청 대기 시간이 초과되었습니다.")
+                time.sleep(min(delay, 1.0))
+        finally:
+            with self._lock:
+                self.waiting -= 1
+                self.throttled_seconds += time.monotonic() - started
+
+    def pause(self, seconds):
+        # 429 등으로 서버가 기다리라고 하면 이 엔드포인트 전체를 잠시 멈춤
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def adapt(self, headers):
+        # 응답 헤더에 맞춰 분당 한도와 남은 요청 수 반영
+        try:
+            limit = int(headers.get("x-ratelimit-limit-requests", 0))
+            remaining = headers.get("x-ratelimit-remaining-requests")
+        except (TypeError, ValueError):
+            return
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        with self._lock:
+            if limit and limit != self.rpm:
+                self.set_rate(limit)
+            if remaining is not None and remaining.isdigit():
+                self.tokens = min(self.tokens, float(remaining))
+                if int(remaining) == 0 and reset:
+                    self.paused_until = max(self.paused_until, time.monotonic() + reset)
+
+
+class RateLimiter:
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+
+    def __init__(self, rpm=None, deadline=DEFAULT_DEADLINE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        limits = dict(DEFAULT_RPM, **(rpm or {}))
+        self.buckets = {name: TokenBucket(value) for name, value in limits.items()}
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self.counters = {name: {"calls": 0, "retries": 0, "hedges": 0, "failures": 0} for name in limits}
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            self.counters[endpoint][name] += 1
+
+    def _attempt(self, endpoint, create, deadline, kwargs, started=None):
+        bucket = self.buckets[endpoint]
+        bucket.acquire(deadline)
+        if started is not None:
+            started.set()
+        try:
+            raw = create(**kwargs)
+        except openai.APIStatusError as e:
+            wait_for = _retry_after(e)
+            if e.status_code == 429:
+                bucket.pause(wait_for if wait_for is not None else BASE_BACKOFF)
+            raise
+        bucket.adapt(raw.headers)
+        return raw.parse()
+
+    def _start(self, endpoint, create, deadline, kwargs, started=None):
+        # 시도마다 스레드 하나 (공용 풀을 쓰면 풀 대기 시간이 헤징 시간에 섞이고 동시 호출 수가 풀 크기로 묶임)
+        future = Future()
+
+        def run():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(self._attempt(endpoint, create, deadline, kwargs, started))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"openai-{endpoint}", daemon=True).start()
+        return future
+
+    def _hedged(self, endpoint, create, deadline, kwargs, hedge_after):
+        # 첫 요청이 실제로 나간 뒤(속도 제한 대기 제외) hedge_after초 안에 안 끝나면
+        # 같은 요청을 하나 더 보내 먼저 끝난 쪽 사용
+        started = threading.Event()
+        first = self._start(endpoint, create, deadline, kwargs, started)
+        while not started.wait(0.05):
+            if first.done():
+                return first.result()
+        done, _ = wait([first], timeout=hedge_after)
+        if done:
+            return first.result()
+        self._count(endpoint, "hedges")
+        second = self._start(endpoint, create, deadline, kwargs)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, endpoint, create, hedge_after=None, **kwargs):
+        # create: client.<...>.with_raw_response.<메서드> (응답 헤더를 읽기 위해 raw 응답 사용)
+        self._count(endpoint, "calls")
+        deadline = time.monotonic() + self.deadline
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if hedge_after is not None:
+                    return self._hedged(endpoint, create, deadline, kwargs, hedge_after)
+                return self._attempt(endpoint, create, deadline, kwargs)
+            except Exception as e:
+                if not _is_retryable(e) or attempt == self.max_attempts:
+                    self._count(endpoint, "failures")
+                    raise
+                # 지터가 들어간 지수 백오프 (서버가 알려준 대기 시간이 더 길면 그만큼)
+                delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (attempt - 1)))
+                delay = max(delay, _retry_after(e) or 0.0)
+                if time.monotonic() + delay > deadline:
+                    self._count(endpoint, "failures")
+                    raise
+                self._count(endpoint, "retries")
+                add_retry()
+                time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            counters = {name: dict(values) for name, values in self.counters.items()}
+        for name, bucket in self.buckets.items():
+            counters[name].update({
+                "rpm": bucket.rpm,
+                "queue_depth": bucket.waiting,
+                "max_queue_depth": bucket.max_waiting,
+                "throttled_seconds": round(bucket.throttled_seconds, 2),
+            })
+        return counters
@@ -0,0 +1,128 @@
+import streamlit as st
+
+# =========================
+# 프로세스 전체에서 한 번만 만드는 공용 자원 (st.cache_resource)
+# 다시 실행(rerun)될 때는 만들어 둔 객체를 그대로 꺼내 쓰기만 함
+# 무거운 모듈(openai, numpy, PyAV 등)은 해당 자원을 처음 쓸 때 import
+# =========================
+
+
+def setting(name, default=None):
+    # 배포별 설정 (.streamlit/secrets.toml)
+    return st.secrets.get(name, default)
+
+
+@st.cache_resource
+def get_client():
+    from openai import OpenAI
+
+    # 재시도는 RateLimiter가 맡으므로 클라이언트 자체 재시도는 끔
+    # openai_base_url: 호환 서버/부하 테스트용 가짜 서버 주소 (없으면 기본 OpenAI)
+    return OpenAI(api_key=st.secrets["api_key"], base_url=setting("openai_base_url"), max_retries=0)
+
+
+@st.cache_resource
+def get_rate_limiter():
+    from .rate_limit import RateLimiter
+
+    # 엔드포인트별 분당 요청 수는 secrets의 rate_limits로 조정 (images / chat / transcription / embeddings)
+    return RateLimiter(rpm=dict(setting("rate_limits", {})))
+
+
+@st.cache_resource
+def get_http_session():
+    from .image_fetch import make_http_session
+
+    # 이미지 URL 다운로드용 연결 풀 (keep-alive 재사용)
+    return make_http_session()
+
+
+@st.cache_resource
+def get_image_cache():
+    from .image_cache import ImageCache
+
+    # 캐시는 키 → 참조만, 바이트는 공용 BlobStore에 한 번만
+    return ImageCache(blobs=get_blob_store())
+
+
+@st.cache_resource
+def get_singleflight():
+    from .singleflight import SingleFlight
+
+    return SingleFlight()
+
+
+@st.cache_resource
+def get_blob_store():
+    from .blob_store import BlobStore
+    from .gallery import referenced_refs
+
+    # 이미지 바이트는 여기 한 번만 저장, 세션에는 참조(해시)만
+    store = BlobStore()
+    # 갤러리 원본은 만들자마자 고정 → 갤러리를 아직 안 열었어도 첫 저장의 용량 정리에서 지워지지 않음
+    store.pin(referenced_refs())
+    return store
+
+
+@st.cache_resource
+def get_previews():
+    from .delivery import Previews
+
+    # 화면에는 작은 미리보기만, 원본 PNG는 다운로드할 때만
+    return Previews(get_blob_store())
+
+
+@st.cache_resource
+def get_job_queue():
+    from .jobs import JobQueue
+
+    # 이미지 생성은 백그라운드 작업으로 실행 (동시 실행 수는 프로세스 전체 기준)
+    return JobQueue(max_workers=int(setting("max_image_jobs", 4)))
+
+
+@st.cache_resource
+def get_image_slots():
+    import threading
+
+    # 동시에 진행 중인 이미지 생성 API 호출 수 상한 (프로세스 전체, 작업 하나 안의 여러 장도 포함)
+    return threading.BoundedSemaphore(int(setting("max_image_jobs", 4)))
+
+
+@st.cache_resource
+def get_audio_ingest():
+    from .audio_ingest import AudioIngest
+
+    # 녹음 → 음성 인식 (변환 여부 판단 + 변환기는 프로세스에 한 번만 로드)
+    return AudioIngest(get_rate_limiter(), get_client())
+
+
+@st.cache_resource
+def get_suggestion_cache():
+    from .services import embed
+    from .suggestion_cache import SuggestionCache
+
+    # 비슷한 주제의 AI 추천 재사용 (유사도 기준은 secrets의 suggestion_threshold)
+    return SuggestionCache(embed, threshold=float(setting("suggestion_threshold", 0.9)))
+
+
+@st.cache_resource
+def get_gallery():
+    from .gallery import Gallery
+
+    # 두 앱에서 만든 모든 그림 기록 (SQLite, 원본은 공용 저장소 참조)
+    return Gallery(get_blob_store())
+
+
+@st.cache_resource
+def get_metrics_exporters():
+    from .tracing import DEFAULT_METRICS_HOST, Exporters, get_tracer
+
+    # 단계별 측정값 내보내기: secrets의 metrics_dir(파일) / metrics_port(HTTP)를 지정했을 때만
+    # metrics_host: HTTP를 열 주소 (기본 127.0.0.1, 수집 서버가 밖에 있으면 지정)
+    return Exporters(
+        get_tracer(),
+        directory=setting("metrics_dir"),
+        port=setting("metrics_port"),
+        interval=float(setting("metrics_interval", 15)),
+        host=setting("metrics_host", DEFAULT_METRICS_HOST),
+    )
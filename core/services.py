@@ -0,0 +1,105 @@
+import time
+
+from .openai_calls import CHAT_MODEL, IMAGE_MODEL, cached_image, chat_text
+from .resources import (
+    get_blob_store,
+    get_client,
+    get_gallery,
+    get_http_session,
+    get_image_cache,
+    get_image_slots,
+    get_rate_limiter,
+    get_singleflight,
+    setting,
+)
+from .singleflight import request_key
+from .tracing import observe, span
+
+# =========================
+# 두 앱이 같이 쓰는 OpenAI 호출
+# 캐시 → 동일 요청 합치기 → 속도 제한/재시도 순서로 감싸져 있음
+# 작업 스레드에서도 부를 수 있도록 st.* 화면 요소는 쓰지 않음
+# 실제 호출은 openai_calls (batch.py와 공유), 여기서는 공용 자원을 넣어 부름
+# =========================
+
+
+def generate_image(prompt, size, model=IMAGE_MODEL, report=None, variant=0):
+    # 같은 (모델, 프롬프트, 크기)면 API 호출 없이 캐시에서 바로 반환 → (바이트, URL 또는 None)
+    # variant: 같은 프롬프트로 여러 장 만들 때 서로 다른 이미지가 나오도록 구분하는 번호
+    def around(fetch):
+        def slotted():
+            if report:
+                report(0.2, "이미지 생성 중...")
+            # 여러 장 작업도 한 장씩 이 자리를 나눠 쓰므로 전체 동시 호출 수는 max_image_jobs를 넘지 않음
+            waited = time.perf_counter()
+            with get_image_slots():
+                observe("image.slot_wait", time.perf_counter() - waited)
+                return fetch()
+
+        # 다른 세션이 같은 이미지를 생성 중이면 그 결과를 기다렸다가 함께 받음
+        key = request_key(kind="image", model=model, prompt=prompt, size=size, variant=variant)
+        return get_singleflight().do(key, slotted)
+
+    # 이미지 수신 방식: "b64"(생성 응답에 바로 포함) / "url"(URL로 따로 다운로드)
+    img_bytes, image_url, _ = cached_image(
+        get_image_cache(), get_rate_limiter(), get_client(), get_http_session(), prompt, size,
+        model=model, mode=setting("image_fetch_mode", "b64"), variant=variant, around=around,
+    )
+    return img_bytes, image_url
+
+
+def generate_image_ref(prompt, size, model=IMAGE_MODEL, report=None, variant=0):
+    # 생성된 이미지를 공용 저장소에 넣고 참조만 반환
+    img_bytes, _ = generate_image(prompt, size, model=model, report=report, variant=variant)
+    return get_blob_store().put(img_bytes)
+
+
+def record_generation(ref, prompt, **meta):
+    # 갤러리에 기록 (작업 스레드에서 호출) → 기록에 실패해도 그림은 그대로 보여줌
+    try:
+        return get_gallery().record(ref, prompt, **meta)
+    except Exception:
+        return None
+
+
+def chat(messages, model=CHAT_MODEL, **kwargs):
+    # 같은 메시지로 동시에 들어온 요청은 한 번만 호출해 응답 텍스트를 공유
+    # 느린 호출은 secrets의 chat_hedge_seconds초 뒤 한 번 더 보냄 (없으면 헤징 안 함)
+    def call():
+        return chat_text(get_rate_limiter(), get_client(), messages, model=model,
+                         hedge_after=setting("chat_hedge_seconds"), **kwargs)
+
+    return get_singleflight().do(request_key(kind="chat", model=model, messages=messages, **kwargs), call)
+
+
+def chat_stream(messages, model=CHAT_MODEL, **kwargs):
+    # 토큰이 도착하는 대로 텍스트 조각을 내보냄 (스트림은 세션마다 따로 받으므로 합치기 대상 아님)
+    # 스트림은 연결이 열릴 때까지만 재시도 (이미 화면에 나간 조각은 되돌릴 수 없으므로 헤징 없음)
+    with span("chat.stream") as traced:
+        stream = get_rate_limiter().call(
+            "chat",
+            get_client().chat.completions.with_raw_response.create,
+            model=model,
+            messages=messages,
+            stream=True,
+            **kwargs,
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                traced.bytes += len(chunk.choices[0].delta.content.encode("utf-8"))
+                yield chunk.choices[0].delta.content
+
+
+def embed(text):
+    from .suggestion_cache import EMBEDDING_DIMENSIONS, EMBEDDING_MODEL
+
+    with span("embeddings") as traced:
+        traced.bytes = len(text.encode("utf-8"))
+        response = get_rate_limiter().call(
+            "embeddings",
+            get_client().embeddings.with_raw_response.create,
+            model=EMBEDDING_MODEL,
+            input=text,
+            dimensions=EMBEDDING_DIMENSIONS,
+        )
+    return response.data[0].embedding
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import threading
+
+# =========================
+# 동일 요청 합치기 (single-flight)
+# 같은 요청이 동시에 여러 세션에서 들어오면 한 번만 호출하고 결과를 나눠 줌
+# =========================
+
+
+def request_key(**params):
+    # 모델/프롬프트/크기/메시지 등 요청 파라미터 → 고정 길이 키
+    raw = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0       # 실제로 실행된 호출 수
+        self.shared = 0      # 다른 호출 결과를 받아 간 요청 수
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # 끝난 호출은 바로 지움 → 다음 요청은 새로 실행 (결과 저장은 캐시가 담당)
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._calls)}
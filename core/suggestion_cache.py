@@ -0,0 +1,191 @@
+import atexit
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+# =========================
+# AI 시각 요소 추천 의미 캐시
+# "꿈속을 걷는 느낌" / "꿈 속을 걷는 기분"처럼 거의 같은 주제면
+# 임베딩 코사인 유사도로 찾아 저장된 추천(스타일/톤/분위기/시점)을 그대로 사용
+# embed(텍스트) → 벡터
+# =========================
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / ".suggestion_cache.npz"
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_THRESHOLD = 0.9
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 256
+SAVE_INTERVAL = 10.0    # 디스크 저장 최소 간격(초)
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_theme(theme):
+    # 유니코드 정규화, 소문자, 문장부호 제거, 공백 정리
+    text = unicodedata.normalize("NFC", theme).lower()
+    return " ".join(_PUNCT_RE.sub(" ", text).split())
+
+
+class SuggestionCache:
+    # 프로세스 전체에서 하나만 만들어 모든 세션이 공유 (st.cache_resource)
+
+    def __init__(self, embed, path=DEFAULT_INDEX_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 threshold=DEFAULT_THRESHOLD):
+        self.embed = embed
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._themes = []                  # 행 번호 → 정규화된 주제
+        self._rows = {}                    # 정규화된 주제 → 행 번호
+        self._values = []                  # 행 번호 → 추천 값
+        self._used = []                    # 행 번호 → 마지막 사용 시각
+        self._vectors = None               # (행 수, 차원) 단위 벡터 행렬
+        self._pending = OrderedDict()      # 조회 때 만든 임베딩 → 저장 때 재사용
+        self._dirty = False
+        self._saved = 0.0
+        self.lookups = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.lookup_seconds = 0.0
+        self.errors = 0
+        self._load()
+        atexit.register(self.save)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                vectors = data["vectors"].astype(np.float32)
+                meta = json.loads(str(data["meta"]))
+        except (OSError, ValueError, KeyError):
+            return
+        if len(meta) != len(vectors):
+            return
+        self._vectors = vectors
+        self._themes = [m["theme"] for m in meta]
+        self._rows = {theme: row for row, theme in enumerate(self._themes)}
+        self._values = [m["value"] for m in meta]
+        self._used = [m["used"] for m in meta]
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or self._vectors is None:
+                return
+            meta = [
+                {"theme": t, "value": v, "used": u}
+                for t, v, u in zip(self._themes, self._values, self._used)
+            ]
+            vectors = self._vectors
+            self._dirty = False
+            self._saved = time.time()
+        with self._save_lock:
+            tmp = self.path.with_suffix(".tmp.npz")
+            np.savez(tmp, vectors=vectors, meta=np.array(json.dumps(meta, ensure_ascii=False)))
+            tmp.replace(self.path)
+
+    def _unit(self, theme):
+        vector = np.asarray(self.embed(theme), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, theme):
+        # 비슷한 주제의 저장된 추천, 없으면 None
+        started = time.perf_counter()
+        key = normalize_theme(theme)
+        try:
+            with self._lock:
+                self.lookups += 1
+                row = self._rows.get(key)
+                if row is not None:
+                    self._used[row] = time.time()
+                    self.exact_hits += 1
+                    return self._values[row]
+                if self._vectors is None or not key:
+                    return None
+            try:
+                query = self._unit(key)
+            except Exception:
+                # 임베딩 실패는 캐시 미스로 처리 (추천은 원래대로 모델이 만듦)
+                with self._lock:
+                    self.errors += 1
+                return None
+            with self._lock:
+                self._pending[key] = query
+                while len(self._pending) > 64:
+                    self._pending.popitem(last=False)
+                if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                    return None
+                scores = self._vectors @ query
+                row = int(np.argmax(scores))
+                if scores[row] < self.threshold:
+                    return None
+                self._used[row] = time.time()
+                self.semantic_hits += 1
+                return self._values[row]
+        finally:
+            with self._lock:
+                self.lookup_seconds += time.perf_counter() - started
+
+    def store(self, theme, value):
+        key = normalize_theme(theme)
+        if not key:
+            return
+        with self._lock:
+            vector = self._pending.pop(key, None)
+        if vector is None:
+            try:
+                vector = self._unit(key)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                return
+        with self._lock:
+            if self._vectors is not None and self._vectors.shape[1] != vector.shape[0]:
+                # 임베딩 모델/차원이 바뀌었으면 예전 색인은 버림
+                self._themes, self._rows, self._values, self._used, self._vectors = [], {}, [], [], None
+            row = self._rows.get(key)
+            if row is not None:
+                self._values[row] = value
+                self._used[row] = time.time()
+            else:
+                if self._vectors is not None and len(self._themes) >= self.max_entries:
+                    # 가장 오래 안 쓴 항목 자리를 재사용
+                    row = int(np.argmin(self._used))
+                    del self._rows[self._themes[row]]
+                    self._rows[key] = row
+                    self._themes[row] = key
+                    self._values[row] = value
+                    self._used[row] = time.time()
+                    self._vectors[row] = vector
+                else:
+                    self._rows[key] = len(self._themes)
+                    self._themes.append(key)
+                    self._values.append(value)
+                    self._used.append(time.time())
+                    row_vector = vector[np.newaxis, :]
+                    self._vectors = row_vector if self._vectors is None else np.vstack([self._vectors, row_vector])
+            self._dirty = True
+            due = time.time() - self._saved > SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            return {
+                "entries": len(self._themes),
+                "lookups": self.lookups,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "hit_rate": hits / self.lookups if self.lookups else 0.0,
+                "avg_lookup_ms": 1000 * self.lookup_seconds / self.lookups if self.lookups else 0.0,
+                "errors": self.errors,
+            }
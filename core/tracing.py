@@ -0,0 +1,296 @@
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# =========================
+# 단계별 소요 시간/자원 기록 (가벼운 추적)
+# with span("chat") as s: ... s.bytes += n; s.cache = "hit"
+# - 단계마다 소요 시간 히스토그램 + 호출/오류/바이트/재시도/캐시 결과 누적
+# - 프로세스에 하나 (모든 세션 합산), 화면(디버그 패널)·파일·HTTP로 내보내기
+# - 외부 의존성 없음 → core의 어떤 모듈에서도 import 가능 (streamlit 불필요)
+# =========================
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+RECENT_SPANS = 200
+METRIC_PREFIX = "drawing_box"
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("stage", "started", "duration", "bytes", "retries", "cache", "error")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.started = time.time()
+        self.duration = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.cache = None      # "hit" / "miss" / None(캐시 없는 단계)
+        self.error = None
+
+    def as_dict(self):
+        return {
+            "stage": self.stage,
+            "started": round(self.started, 3),
+            "duration": round(self.duration, 4),
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "cache": self.cache,
+            "error": self.error,
+        }
+
+
+class StageStats:
+    __slots__ = ("buckets", "count", "total", "errors", "bytes", "retries", "hits", "misses")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)   # 마지막 칸은 +Inf
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.bytes = 0
+        self.retries = 0
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, span):
+        self.buckets[bisect.bisect_left(BUCKETS, span.duration)] += 1
+        self.count += 1
+        self.total += span.duration
+        self.errors += span.error is not None
+        self.bytes += span.bytes
+        self.retries += span.retries
+        self.hits += span.cache == "hit"
+        self.misses += span.cache == "miss"
+
+    def quantile(self, q):
+        # 히스토그램 칸 안에서 선형 보간한 근사값 (Prometheus histogram_quantile과 같은 방식)
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+    def summary(self):
+        cached = self.hits + self.misses
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_seconds": self.total / self.count if self.count else None,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99),
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": self.hits / cached if cached else None,
+        }
+
+
+class Tracer:
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._recent = deque(maxlen=RECENT_SPANS)
+
+    @contextmanager
+    def span(self, stage):
+        span = Span(stage)
+        token = _current.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current.reset(token)
+            self.record(span)
+
+    def record(self, span):
+        with self._lock:
+            stats = self._stages.get(span.stage)
+            if stats is None:
+                stats = self._stages[span.stage] = StageStats()
+            stats.add(span)
+            self._recent.append(span)
+
+    def summary(self):
+        with self._lock:
+            return {stage: stats.summary() for stage, stats in sorted(self._stages.items())}
+
+    def recent(self, limit=50):
+        with self._lock:
+            return [span.as_dict() for span in list(self._recent)[-limit:]][::-1]
+
+    def as_json(self):
+        return json.dumps({
+            "started": self.started,
+            "exported": time.time(),
+            "buckets": list(BUCKETS),
+            "stages": self.summary(),
+            "histograms": self._histograms(),
+        }, ensure_ascii=False, indent=2)
+
+    def _histograms(self):
+        with self._lock:
+            return {stage: list(stats.buckets) for stage, stats in self._stages.items()}
+
+    def prometheus_text(self):
+        # Prometheus text exposition format 0.0.4
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Duration of each pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        counters = {
+            "calls_total": ("Stage executions.", "count"),
+            "errors_total": ("Stage executions that raised.", "errors"),
+            "bytes_total": ("Payload bytes handled by the stage.", "bytes"),
+            "retries_total": ("API retries inside the stage.", "retries"),
+        }
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for stage, stats in stages:
+                cumulative = 0
+                for bound, count in zip((*BUCKETS, "+Inf"), stats.buckets):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {stats.total:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {stats.count}')
+            for suffix, (help_text, attribute) in counters.items():
+                metric = f"{METRIC_PREFIX}_stage_{suffix}"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                lines += [f'{metric}{{stage="{stage}"}} {getattr(stats, attribute)}' for stage, stats in stages]
+            metric = f"{METRIC_PREFIX}_stage_cache_total"
+            lines += [f"# HELP {metric} Cache outcomes per stage.", f"# TYPE {metric} counter"]
+            for stage, stats in stages:
+                if stats.hits or stats.misses:
+                    lines.append(f'{metric}{{stage="{stage}",outcome="hit"}} {stats.hits}')
+                    lines.append(f'{metric}{{stage="{stage}",outcome="miss"}} {stats.misses}')
+        return "\n".join(lines) + "\n"
+
+    def write_files(self, directory):
+        # metrics.prom (node_exporter textfile 수집기용) + metrics.json, 임시 파일 → 교체
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for file_name, text in (("metrics.prom", self.prometheus_text()), ("metrics.json", self.as_json())):
+            tmp = directory / f".{file_name}.tmp"
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, directory / file_name)
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(stage):
+    return _tracer.span(stage)
+
+
+def observe(stage, duration, **attributes):
+    # 밖에서 잰 시간을 그대로 기록 (예: 대기열에서 기다린 시간)
+    recorded = Span(stage)
+    recorded.duration = duration
+    for name, value in attributes.items():
+        setattr(recorded, name, value)
+    _tracer.record(recorded)
+
+
+def current():
+    # 지금 스레드에서 진행 중인 단계 (없으면 None)
+    return _current.get()
+
+
+def add_retry():
+    # RateLimiter가 재시도할 때 호출 → 진행 중인 단계에 재시도 횟수 반영
+    active = _current.get()
+    if active is not None:
+        active.retries += 1
+
+
+# =========================
+# 내보내기 (secrets로 켬)
+# - metrics_dir: 주기적으로 metrics.prom / metrics.json 파일 쓰기
+# - metrics_port: /metrics (Prometheus 텍스트), /metrics.json HTTP 엔드포인트
+#   인증이 없으므로 기본은 이 컴퓨터에서만 접속 (metrics_host로 바꿀 수 있음)
+# =========================
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+
+class Exporters:
+    def __init__(self, tracer, directory=None, port=None, interval=15.0, host=DEFAULT_METRICS_HOST):
+        self.tracer = tracer
+        self.directory = directory
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.server = None
+        self.error = None
+        self._stop = threading.Event()
+        if directory:
+            threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True).start()
+        if port:
+            try:
+                self.server = self._serve(int(port))
+            except OSError as e:
+                # 포트를 이미 다른 프로세스(다른 앱)가 쓰고 있으면 HTTP만 끄고 계속
+                self.error = str(e)
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tracer.write_files(self.directory)
+            except OSError:
+                pass
+
+    def _serve(self, port):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        tracer = self.tracer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = tracer.as_json(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = tracer.prometheus_text(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((self.host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    def stop(self):
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
@@ -0,0 +1,84 @@
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+from .options import OPTIONS
+
+# =========================
+# 여러 장(변형) 동시 생성
+# DALL·E 3는 n=1만 되므로 N번 호출을 동시에 보내고(동시 실행 수 제한),
+# 끝나는 대로 job.detail["cells"]의 해당 칸을 채움 → 화면 격자가 한 칸씩 채워짐
+# 실제 API 호출 수는 services의 공용 이미지 자리(get_image_slots)가 프로세스 전체 기준으로 제한
+# =========================
+VARY_CHOICES = {"none": "같은 설정으로", "tone": "색상 톤 바꿔가며", "viewpoint": "시점 바꿔가며"}
+MAX_VARIANTS = 8
+DEFAULT_CONCURRENCY = 4
+
+
+def plan_variants(selection, n, vary, make_prompt=None):
+    # selection: {"style", "tone", "mood", "viewpoint"}, make_prompt(selection) → 프롬프트
+    # make_prompt가 None이면 프롬프트는 비워 두고 variants_job이 작업 스레드에서 채움 (AI로 다시 쓸 때)
+    # 반환: [{"label", "prompt", "variant", "selection"}] (variant는 같은 프롬프트를 구분하는 번호)
+    n = max(1, min(MAX_VARIANTS, n))
+    if vary not in ("tone", "viewpoint"):
+        prompt = make_prompt(selection) if make_prompt else None
+        return [
+            {"label": f"#{i + 1}", "prompt": prompt, "variant": i, "selection": dict(selection)} for i in range(n)
+        ]
+
+    values = OPTIONS[vary]
+    start = values.index(selection[vary]) if selection.get(vary) in values else 0
+    plan = []
+    for i in range(n):
+        value = values[(start + i) % len(values)]
+        varied = dict(selection, **{vary: value})
+        # 옵션 수보다 많이 만들면 같은 값이 다시 나오므로 번호로 구분 (한 바퀴를 다 돈 뒤부터 1, 2, ...)
+        plan.append({
+            "label": value,
+            "prompt": make_prompt(varied) if make_prompt else None,
+            "variant": i // len(values),
+            "selection": varied,
+        })
+    return plan
+
+
+def variants_job(job, plan, size, generate_ref, max_concurrency=DEFAULT_CONCURRENCY, record=None, make_prompt=None):
+    # 작업 스레드에서 실행 → st.* 호출 금지
+    # record(item, ref): 한 장이 끝날 때마다 호출 (갤러리 기록 등)
+    # make_prompt(selection): 프롬프트가 비어 있는 칸은 여기서 장마다 만듦 (바뀐 시각 요소로 새로 작성)
+    cells = job.detail["cells"] = [None] * len(plan)
+    job.detail["plan"] = plan
+    job.report(0.05, f"0/{len(plan)} 완료")
+
+    def run(item):
+        if item["prompt"] is None:
+            item["prompt"] = make_prompt(item["selection"])
+        ref = generate_ref(item["prompt"], size, variant=item["variant"])
+        if record is not None:
+            record(item, ref)
+        return ref
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(plan))),
+                            thread_name_prefix="image-variant") as pool:
+        futures = {pool.submit(run, item): index for index, item in enumerate(plan)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                cells[index] = {"ref": future.result()}
+            except Exception as e:
+                cells[index] = {"error": str(e)}
+            job.report(done / len(plan), f"{done}/{len(plan)} 완료")
+    if all("error" in cell for cell in cells):
+        raise RuntimeError(cells[0]["error"])
+    return cells
+
+
+def zip_images(blobs, refs, prefix="my_art_box"):
+    # 다운로드 버튼을 눌렀을 때만 만들어지도록 지연 호출 함수로 넘겨 사용
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for number, ref in enumerate(refs, start=1):
+            data = blobs.get(ref)
+            if data is not None:
+                archive.writestr(f"{prefix}_{number}.png", data)
+    return buffer.getvalue()
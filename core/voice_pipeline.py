@@ -0,0 +1,46 @@
+import time
+
+# =========================
+# 음성 → 이미지 파이프라인 (백그라운드 작업 하나로 실행)
+# 1) 음성 인식: 스트리밍으로 받아 글자가 오는 대로 job.detail["text"]에 반영
+# 2) 인식이 끝나면 바로 프롬프트를 만들어 이미지 생성 시작
+# 화면은 job.detail을 폴링해 인식된 글자와 단계별 진행 상황을 표시
+# =========================
+STAGES = {
+    "transcribe": (0.05, "🎧 음성 인식 중..."),
+    "image": (0.4, "🎨 이미지 생성 중..."),
+}
+
+
+def _stage(job, name):
+    progress, message = STAGES[name]
+    job.detail["stage"] = name
+    job.report(progress, message)
+
+
+def voice_to_image(job, ingest, audio_bytes, make_prompt, generate, size="1024x1024"):
+    # make_prompt(텍스트) → 프롬프트, generate(프롬프트, 크기, report) → 결과(이미지 참조)
+    timings = job.detail.setdefault("timings", {})
+    started = time.perf_counter()
+
+    _stage(job, "transcribe")
+
+    def on_text(text):
+        if "first_text" not in timings:
+            timings["first_text"] = time.perf_counter() - started
+        job.detail["text"] = text
+
+    text = ingest.transcribe(audio_bytes, on_text=on_text)
+    if not text:
+        raise ValueError("음성에서 주제를 알아듣지 못했어요. 다시 녹음해 주세요.")
+    job.detail["text"] = text
+    timings["transcribe"] = time.perf_counter() - started
+
+    _stage(job, "image")
+    prompt = make_prompt(text)
+    job.detail["prompt"] = prompt
+    image_started = time.perf_counter()
+    result = generate(prompt, size, report=lambda progress, message=None: job.report(0.4 + 0.6 * progress, message))
+    timings["image"] = time.perf_counter() - image_started
+    timings["total"] = time.perf_counter() - started
+    return result
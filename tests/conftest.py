@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 저장소 최상위에서 core/, batch.py를 import할 수 있도록
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,126 @@
+import json
+import zipfile
+
+import batch
+from batch import Checkpoint, DirectoryOutput, ZipOutput, read_rows, run_batch
+
+
+class FakeGenerator:
+    # 실제 API 대신 프롬프트/이미지를 바로 돌려주고 호출을 기록
+    def __init__(self, fail_themes=()):
+        self.fail_themes = set(fail_themes)
+        self.prompts = []
+        self.images = []
+
+    def prompt(self, row):
+        self.prompts.append(row["theme"])
+        selection = {name: row[name] for name in ("style", "tone", "mood", "viewpoint")}
+        return f"prompt for {row['theme']}", selection
+
+    def image(self, prompt, size, variant=0):
+        self.images.append((prompt, variant))
+        if any(theme in prompt for theme in self.fail_themes):
+            raise RuntimeError("generation failed")
+        return f"{prompt}#{variant}".encode("utf-8"), False
+
+
+def write_csv(path, themes):
+    path.write_text("theme,style,tone,mood,viewpoint,size\n" + "".join(
+        f"{theme},수채화 스타일,차가운 블루,고요함|희망,정면,1024x1792 (세로형)\n" for theme in themes
+    ), encoding="utf-8-sig")
+    return path
+
+
+def quiet(*args):
+    pass
+
+
+def test_read_rows_normalizes_and_numbers_duplicates(tmp_path):
+    rows = read_rows(write_csv(tmp_path / "in.csv", ["고래", "", "고래", "별"]))
+    assert [row["theme"] for row in rows] == ["고래", "고래", "별"]
+    assert rows[0]["mood"] == ["고요함", "희망"]
+    assert rows[0]["size"] == "1024x1792"
+    # 같은 내용의 행은 변형 번호와 id가 달라짐
+    assert [row["variant"] for row in rows] == [0, 1, 0]
+    assert rows[0]["id"] != rows[1]["id"]
+    assert rows[0]["id"] == read_rows(tmp_path / "in.csv")[0]["id"]
+
+
+def test_read_rows_jsonl(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text(json.dumps({"theme": "고래", "mood": ["희망"], "id": "custom"}, ensure_ascii=False) + "\n",
+                    encoding="utf-8")
+    (row,) = read_rows(path)
+    assert row["id"] == "custom"
+    assert row["mood"] == ["희망"]
+
+
+def test_read_rows_skips_unknown_options_and_sizes(tmp_path, capsys):
+    path = tmp_path / "in.csv"
+    path.write_text("theme,style,tone,mood,viewpoint,size\n"
+                    "고래,수채화 스타일,차가운 블루,고요함,정면,1792x1024\n"
+                    "별,유화풍,차가운 블루,고요함,정면,1024x1024\n"
+                    "달,수채화 스타일,차가운 블루,고요함|행복,정면,1024x1024\n"
+                    "해,수채화 스타일,차가운 블루,고요함,정면,512x512\n", encoding="utf-8")
+    rows = read_rows(path)
+    assert [(row["theme"], row["size"]) for row in rows] == [("고래", "1792x1024")]
+    err = capsys.readouterr().err
+    assert "2행: style '유화풍'" in err
+    assert "3행: mood '행복'" in err
+    assert "4행: size '512x512'" in err
+
+
+def test_checkpoint_keeps_last_entry_and_skips_torn_line(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "manifest.jsonl")
+    checkpoint.record({"id": "a", "status": "failed"})
+    checkpoint.record({"id": "a", "status": "done", "file": "a.png"})
+    with checkpoint.path.open("a", encoding="utf-8") as f:
+        f.write('{"id": "b", "sta')
+    assert checkpoint.load() == {"a": {"id": "a", "status": "done", "file": "a.png"}}
+
+
+def test_resume_only_generates_unfinished_rows(tmp_path):
+    rows = read_rows(write_csv(tmp_path / "in.csv", ["고래", "별", "달"]))
+    output = DirectoryOutput(tmp_path / "out")
+    checkpoint = Checkpoint(output.manifest_path)
+
+    first = FakeGenerator(fail_themes=["별"])
+    assert run_batch(rows, first, output, checkpoint, concurrency=2, log=quiet) == {
+        "done": 2, "failed": 1, "cached": 0,
+    }
+
+    second = FakeGenerator()
+    assert run_batch(rows, second, output, checkpoint, concurrency=2, log=quiet)["done"] == 1
+    assert second.prompts == ["별"]
+    assert {entry["status"] for entry in checkpoint.load().values()} == {"done"}
+    assert len(list(output.path.glob("*.png"))) == 3
+
+
+def test_resume_regenerates_missing_file_with_saved_prompt(tmp_path):
+    rows = read_rows(write_csv(tmp_path / "in.csv", ["고래"]))
+    output = DirectoryOutput(tmp_path / "out")
+    checkpoint = Checkpoint(output.manifest_path)
+    run_batch(rows, FakeGenerator(), output, checkpoint, log=quiet)
+    (output.path / batch.file_name(rows[0])).unlink()
+
+    again = FakeGenerator()
+    run_batch(rows, again, output, checkpoint, log=quiet)
+    # 프롬프트는 manifest에 남은 것을 다시 쓰고 이미지만 다시 만듦
+    assert again.prompts == []
+    assert again.images == [("prompt for 고래", 0)]
+
+
+def test_zip_output_appends_across_runs(tmp_path):
+    rows = read_rows(write_csv(tmp_path / "in.csv", ["고래", "별"]))
+    path = tmp_path / "out.zip"
+
+    output = ZipOutput(path)
+    run_batch(rows[:1], FakeGenerator(), output, Checkpoint(output.manifest_path), log=quiet)
+    output.close()
+    output = ZipOutput(path)
+    run_batch(rows, FakeGenerator(), output, Checkpoint(output.manifest_path), log=quiet)
+    output.close()
+
+    with zipfile.ZipFile(path) as archive:
+        assert sorted(archive.namelist()) == sorted(batch.file_name(row) for row in rows)
+    assert output.manifest_path.name == "out.zip.manifest.jsonl"
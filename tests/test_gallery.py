@@ -0,0 +1,122 @@
+import os
+import random
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from core.blob_store import BlobStore
+from core.gallery import Gallery, _fts_query, perceptual_hash, referenced_refs
+
+
+def picture(seed, size=64):
+    # seed마다 다른 무작위 격자 → dHash가 서로 멀리 떨어진 그림
+    rng = random.Random(seed)
+    grid = Image.new("L", (9, 8))
+    grid.putdata([rng.randrange(256) for _ in range(72)])
+    buffer = BytesIO()
+    grid.resize((size, size), Image.NEAREST).convert("RGB").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def gallery(tmp_path):
+    return Gallery(BlobStore(tmp_path / "blobs"), path=tmp_path / "gallery.db")
+
+
+def add(gallery, seed, **meta):
+    data = picture(seed)
+    return gallery.record(gallery.blobs.put(data), meta.pop("prompt", f"prompt {seed}"), **meta)
+
+
+def test_near_duplicate_is_not_stored_twice(gallery):
+    data = picture(1)
+    first = gallery.record(gallery.blobs.put(data), "a")
+    # 크기만 바꾼 같은 그림 → 해시가 거의 같음
+    resized = BytesIO()
+    Image.open(BytesIO(data)).resize((200, 200)).save(resized, "PNG")
+    assert gallery.record(gallery.blobs.put(resized.getvalue()), "b") == first
+    assert gallery.stats() == {"entries": 1, "added": 1, "duplicates": 1}
+    assert gallery.get(first)["repeats"] == 1
+
+
+def test_perceptual_hash_is_stable_under_recompression():
+    data = picture(2)
+    jpeg = BytesIO()
+    Image.open(BytesIO(data)).convert("RGB").save(jpeg, "JPEG", quality=70)
+    assert bin(perceptual_hash(data) ^ perceptual_hash(jpeg.getvalue())).count("1") <= 3
+
+
+def test_keyset_pages_cover_everything_newest_first(gallery):
+    ids = [add(gallery, seed) for seed in range(10, 17)]
+    seen, cursor = [], None
+    while True:
+        items, cursor = gallery.page(before=cursor, limit=3)
+        seen += [item["id"] for item in items]
+        if cursor is None:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_filters_and_full_text_search(gallery):
+    whale = add(gallery, 3, theme="바다의 고래", style="수채화 스타일", tone="차가운 블루", mood=["고요함", "희망"])
+    add(gallery, 4, theme="숲속 고양이", style="유화 스타일", tone="차가운 블루", mood=["희망"])
+    add(gallery, 5, theme="도시의 밤", style="수채화 스타일", tone="형광 네온", mood=["설렘"],
+        prompt="neon city at night")
+
+    def ids(**filters):
+        return [item["id"] for item in gallery.page(**filters)[0]]
+
+    assert len(ids(style="수채화 스타일")) == 2
+    assert len(ids(tone="차가운 블루")) == 2
+    assert len(ids(mood="희망")) == 2
+    assert ids(style="수채화 스타일", mood="고요함") == [whale]
+    # 접두어 검색: "바다" → "바다의"
+    assert ids(query="바다") == [whale]
+    assert len(ids(query="night")) == 1
+    # 따옴표가 섞여도 검색식이 깨지지 않음
+    assert ids(query='"고래') == [whale]
+
+
+def test_fts_query_quotes_terms():
+    assert _fts_query('바다 "고래') == '"바다"* AND "고래"*'
+    assert _fts_query("   ") == ""
+
+
+def test_recorded_originals_survive_blob_eviction(tmp_path):
+    blobs = BlobStore(tmp_path / "blobs", disk_bytes=4000)
+    gallery = Gallery(blobs, path=tmp_path / "gallery.db")
+    ref = blobs.put(picture(5))
+    gallery.record(ref, "keep me")
+    for _ in range(20):
+        blobs.put(os.urandom(500))
+    assert blobs.exists(ref) and blobs.get(ref) is not None
+
+    # 다시 시작: get_blob_store()처럼 저장소를 만들 때 고정만 하고 갤러리는 만들지 않은 채 바로 저장
+    reopened = BlobStore(tmp_path / "blobs", disk_bytes=4000)
+    reopened.pin(referenced_refs(tmp_path / "gallery.db"))
+    for _ in range(20):
+        reopened.put(os.urandom(500))
+    assert reopened.exists(ref) and reopened.get(ref) is not None
+
+
+def test_referenced_refs_without_database(tmp_path):
+    assert referenced_refs(tmp_path / "missing.db") == []
+
+
+def test_deduplicated_image_is_not_pinned(gallery):
+    data = picture(7)
+    kept = gallery.blobs.put(data)
+    gallery.record(kept, "original")
+    jpeg = BytesIO()
+    Image.open(BytesIO(data)).save(jpeg, "JPEG", quality=70)
+    duplicate = gallery.blobs.put(jpeg.getvalue())
+    gallery.record(duplicate, "again")
+    assert gallery.stats()["duplicates"] == 1
+    assert kept in gallery.blobs._pinned
+    assert duplicate not in gallery.blobs._pinned
+
+
+def test_missing_blob_is_not_recorded(gallery):
+    assert gallery.record("0" * 64, "gone") is None
+    assert gallery.stats()["entries"] == 0
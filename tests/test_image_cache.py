@@ -0,0 +1,84 @@
+import os
+import time
+
+from core.blob_store import BlobStore, blob_ref
+from core.image_cache import ImageCache, cache_key
+
+
+def test_key_normalizes_whitespace_and_keeps_variant_zero_stable():
+    assert cache_key("m", "a  cat\n", "1024x1024") == cache_key("m", " a cat", "1024x1024")
+    assert cache_key("m", "a cat", "1024x1024", variant=0) == cache_key("m", "a cat", "1024x1024")
+    assert cache_key("m", "a cat", "1024x1024", variant=1) != cache_key("m", "a cat", "1024x1024")
+
+
+def make_cache(tmp_path, **kwargs):
+    blobs = kwargs.pop("blobs", None) or BlobStore(tmp_path / "blobs")
+    return ImageCache(tmp_path / "cache", blobs=blobs, **kwargs)
+
+
+def test_put_then_get_round_trip(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get("m", "p", "s") is None
+    ref = cache.put("m", "p", "s", b"png")
+    assert ref == blob_ref(b"png")
+    assert cache.get("m", "p", "s") == b"png"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_keeps_only_a_reference_next_to_the_blob(tmp_path):
+    cache = make_cache(tmp_path)
+    ref = cache.put("m", "p", "s", b"png" * 100)
+    # 바이트는 BlobStore에 한 번만, 캐시 폴더에는 참조 파일만
+    assert cache.blobs.put(b"png" * 100) == ref
+    assert cache.blobs.stats()["disk_entries"] == 1
+    assert not list((tmp_path / "cache").glob("*/*.png"))
+    (path,) = (tmp_path / "cache").glob("*/*.ref")
+    assert path.read_text() == ref
+
+
+def test_blob_evicted_by_store_is_a_miss(tmp_path):
+    cache = make_cache(tmp_path, blobs=BlobStore(tmp_path / "blobs", ram_bytes=0, disk_bytes=20))
+    cache.put("m", "a", "s", b"a" * 10)
+    cache.put("m", "b", "s", b"b" * 10)
+    cache.get("m", "a", "s")                  # a를 최근 사용으로
+    cache.put("m", "c", "s", b"c" * 10)       # BlobStore 한도 초과 → b가 빠짐
+    assert cache.get("m", "b", "s") is None
+    assert cache.get("m", "a", "s") == b"a" * 10
+    assert cache.get("m", "c", "s") == b"c" * 10
+    assert cache.stats()["entries"] == 2
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = make_cache(tmp_path, ttl=60)
+    cache.put("m", "p", "s", b"png")
+    key = cache_key("m", "p", "s")
+    ref, created = cache._entries[key]
+    cache._entries[key] = (ref, created - 120)
+    assert cache.get("m", "p", "s") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_reload_keeps_existing_references(tmp_path):
+    make_cache(tmp_path).put("m", "p", "s", b"png")
+    assert make_cache(tmp_path).get("m", "p", "s") == b"png"
+
+
+def test_reload_drops_references_past_ttl(tmp_path):
+    make_cache(tmp_path).put("m", "p", "s", b"png")
+    path = next((tmp_path / "cache").glob("*/*.ref"))
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    assert make_cache(tmp_path, ttl=60).get("m", "p", "s") is None
+    assert not path.exists()
+
+
+def test_reload_moves_old_png_copies_into_blob_store(tmp_path):
+    key = cache_key("m", "p", "s")
+    legacy = tmp_path / "cache" / key[:2] / f"{key}.png"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"png")
+    cache = make_cache(tmp_path)
+    assert not legacy.exists()
+    assert cache.get("m", "p", "s") == b"png"
+    assert cache.blobs.get(blob_ref(b"png")) == b"png"
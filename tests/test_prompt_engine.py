@@ -0,0 +1,103 @@
+import json
+
+from core.prompt_engine import build_prompt, partial_json_string, validate_attributes
+
+OPTIONS = {
+    "style": ["수채화 스타일", "유화 스타일"],
+    "tone": ["차가운 블루", "따뜻한 파스텔톤"],
+    "mood": ["고요함", "희망"],
+    "viewpoint": ["정면", "위에서"],
+}
+SELECTION = {"style": "유화 스타일", "tone": "따뜻한 파스텔톤", "mood": ["희망"], "viewpoint": "위에서"}
+
+
+def translate(style, tone, mood, viewpoint):
+    return style, tone, ", ".join(mood), viewpoint
+
+
+def test_partial_json_string_follows_a_growing_buffer():
+    full = json.dumps({"style": "a", "prompt": 'A "quoted" \\ cat\nnext'})
+    seen = [partial_json_string(full[:end], "prompt") for end in range(len(full) + 1)]
+    assert seen[-1] == 'A "quoted" \\ cat\nnext'
+    # 조각이 늘어나는 동안 앞부분이 바뀌거나 잘린 이스케이프가 새어 나오지 않음
+    for shorter, longer in zip(seen, seen[1:]):
+        assert longer.startswith(shorter)
+
+
+def test_partial_json_string_waits_for_split_unicode_escape():
+    buffer = '{"prompt": "\\uc548\\ub1'
+    assert partial_json_string(buffer, "prompt") == "안"
+    assert partial_json_string(buffer + '55"}', "prompt") == "안녕"
+
+
+def test_partial_json_string_missing_field():
+    assert partial_json_string('{"style": "a"', "prompt") == ""
+
+
+def test_validate_attributes_keeps_selection_for_unknown_values():
+    result = validate_attributes({"style": "없는 스타일", "tone": "차가운 블루", "mood": "희망, 없음"},
+                                 SELECTION, OPTIONS)
+    assert result["style"] == "유화 스타일"
+    assert result["tone"] == "차가운 블루"
+    assert result["mood"] == ["희망"]
+
+
+class Memo:
+    def __init__(self, remembered=None):
+        self.remembered = remembered
+        self.lookups = 0
+        self.stored = []
+
+    def lookup(self, theme):
+        self.lookups += 1
+        return self.remembered
+
+    def store(self, theme, attributes):
+        self.stored.append(attributes)
+
+
+def test_structured_mode_is_one_call_and_skips_the_memo():
+    calls = []
+
+    def chat(messages, **kwargs):
+        calls.append(kwargs)
+        return json.dumps({"style": "수채화 스타일", "tone": "차가운 블루", "mood": ["고요함"],
+                           "viewpoint": "정면", "prompt": "A calm whale"})
+
+    memo = Memo(remembered=dict(SELECTION))
+    result = build_prompt(chat, "고래", SELECTION, OPTIONS, translate, memo=memo)
+    assert result["prompt"] == "A calm whale"
+    assert result["style"] == "수채화 스타일"
+    assert len(calls) == 1 and "response_format" in calls[0]
+    assert memo.lookups == 0 and memo.stored == []
+
+
+def test_structured_mode_falls_back_to_two_step_on_broken_json():
+    replies = iter(["not json", "Style: 수채화 스타일\nColor tone: 차가운 블루\nMood: 고요함\nViewpoint: 정면",
+                    "A calm whale"])
+    result = build_prompt(lambda messages, **kwargs: next(replies), "고래", SELECTION, OPTIONS, translate)
+    assert result["prompt"] == "A calm whale"
+    assert result["tone"] == "차가운 블루"
+
+
+def test_two_step_memo_hit_skips_the_suggestion_call():
+    calls = []
+
+    def chat(messages, **kwargs):
+        calls.append(messages[0]["content"])
+        return "A calm whale"
+
+    remembered = {"style": "수채화 스타일", "tone": "차가운 블루", "mood": ["고요함"], "viewpoint": "정면"}
+    result = build_prompt(chat, "고래", SELECTION, OPTIONS, translate, mode="two_step", memo=Memo(remembered))
+    assert len(calls) == 1 and "Color tone: 차가운 블루" in calls[0]
+    assert result["prompt"] == "A calm whale"
+
+
+def test_streaming_reports_growing_prompt_text():
+    shown = []
+    chunks = ['{"style": "수채화 스타일", "tone": "차가운 블루", "mood": ["고요함"], "viewpoint": "정면", ',
+              '"prompt": "A calm', ' whale"}']
+    result = build_prompt(None, "고래", SELECTION, OPTIONS, translate,
+                          chat_stream=lambda messages, **kwargs: iter(chunks), on_text=shown.append)
+    assert shown == ["A calm", "A calm whale"]
+    assert result["prompt"] == "A calm whale"
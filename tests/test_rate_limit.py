@@ -0,0 +1,164 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from core import rate_limit
+from core.rate_limit import RateLimiter, TokenBucket, parse_duration
+
+
+def status_error(cls, status, headers=None):
+    # openai 예외는 실제 HTTP 응답을 요구하므로 필요한 속성만 채워 만듦
+    error = cls.__new__(cls)
+    Exception.__init__(error, f"HTTP {status}")
+    error.response = SimpleNamespace(headers=headers or {})
+    error.status_code = status
+    return error
+
+
+class Raw:
+    def __init__(self, value, headers=None):
+        self.value = value
+        self.headers = headers or {}
+
+    def parse(self):
+        return self.value
+
+
+def scripted(*outcomes):
+    # 부를 때마다 outcomes를 차례로 돌려주거나 예외로 던지는 가짜 create
+    outcomes = list(outcomes)
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return Raw(outcome)
+
+    create.calls = calls
+    return create
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limit.time, "sleep", slept.append)
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: 0.0)
+    return slept
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("1.5", 1.5), ("1h2m", 3720.0), ("", None), ("soon", None),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_retries_server_errors_then_succeeds(sleeps):
+    limiter = RateLimiter()
+    create = scripted(status_error(openai.InternalServerError, 500), "ok")
+    assert limiter.call("chat", create, model="m") == "ok"
+    assert len(create.calls) == 2
+    assert limiter.stats()["chat"]["retries"] == 1
+    assert limiter.stats()["chat"]["failures"] == 0
+
+
+def test_rate_limit_waits_for_retry_after_and_pauses_bucket(sleeps):
+    limiter = RateLimiter()
+    paused = []
+    limiter.buckets["images"].pause = paused.append
+    error = status_error(openai.RateLimitError, 429, {"retry-after-ms": "2500"})
+    assert limiter.call("images", scripted(error, "ok")) == "ok"
+    assert paused == [2.5]
+    assert 2.5 in sleeps
+
+
+def test_client_errors_are_not_retried(sleeps):
+    limiter = RateLimiter()
+    create = scripted(status_error(openai.BadRequestError, 400), "ok")
+    with pytest.raises(openai.BadRequestError):
+        limiter.call("chat", create)
+    assert len(create.calls) == 1
+    assert limiter.stats()["chat"]["failures"] == 1
+
+
+def test_gives_up_after_max_attempts(sleeps):
+    limiter = RateLimiter(max_attempts=3)
+    create = scripted(*[status_error(openai.InternalServerError, 503)] * 3)
+    with pytest.raises(openai.InternalServerError):
+        limiter.call("chat", create)
+    assert len(create.calls) == 3
+    assert limiter.stats()["chat"]["retries"] == 2
+
+
+def test_does_not_retry_past_the_deadline(sleeps):
+    limiter = RateLimiter(deadline=1.0)
+    error = status_error(openai.RateLimitError, 429, {"retry-after": "30s"})
+    with pytest.raises(openai.RateLimitError):
+        limiter.call("chat", scripted(error, "ok"))
+    assert sleeps == []
+
+
+def test_hedged_call_uses_the_first_response():
+    limiter = RateLimiter()
+    release = threading.Event()
+    count = []
+
+    def create(**kwargs):
+        count.append(1)
+        if len(count) == 1:
+            release.wait(5)      # 첫 요청은 느리게
+            return Raw("slow")
+        return Raw("fast")
+
+    try:
+        assert limiter.call("chat", create, hedge_after=0.01) == "fast"
+        assert limiter.stats()["chat"]["hedges"] == 1
+    finally:
+        release.set()
+
+
+def test_bucket_times_out_instead_of_waiting_past_deadline():
+    bucket = TokenBucket(rpm=60)
+    bucket.tokens = 0
+    with pytest.raises(TimeoutError):
+        bucket.acquire(deadline=time.monotonic())
+
+
+def test_bucket_adapts_to_rate_limit_headers():
+    bucket = TokenBucket(rpm=50)
+    bucket.adapt({"x-ratelimit-limit-requests": "120", "x-ratelimit-remaining-requests": "0",
+                  "x-ratelimit-reset-requests": "2s"})
+    assert bucket.rpm == 120
+    assert bucket.tokens == 0
+    assert bucket.paused_until > time.monotonic() + 1
+
+
+def test_hedged_calls_are_not_capped_by_a_shared_pool():
+    limiter = RateLimiter(rpm={"chat": 100000})
+    barrier = threading.Barrier(12, timeout=5)
+
+    def create(**kwargs):
+        barrier.wait()           # 12개가 동시에 실행 중이어야 통과
+        return Raw("ok")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(limiter.call("chat", create, hedge_after=5)))
+               for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert results == ["ok"] * 12
+    assert limiter.stats()["chat"]["hedges"] == 0
+
+
+def test_rate_limit_wait_does_not_trigger_a_hedge():
+    limiter = RateLimiter()
+    limiter.buckets["chat"].pause(0.3)      # 요청이 나가기 전 대기는 헤징 시간에 넣지 않음
+    assert limiter.call("chat", scripted("ok"), hedge_after=0.1) == "ok"
+    assert limiter.stats()["chat"]["hedges"] == 0
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.singleflight import SingleFlight, request_key
+
+
+def test_request_key_ignores_argument_order():
+    assert request_key(kind="image", prompt="p", size="s") == request_key(size="s", prompt="p", kind="image")
+    assert request_key(kind="image", prompt="p") != request_key(kind="image", prompt="q")
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "k", slow)
+        assert started.wait(5)
+        followers = [pool.submit(flight.do, "k", slow) for _ in range(3)]
+        # 뒤따라온 요청이 모두 기다리기 시작할 때까지
+        while flight._calls["k"].waiters < 3:
+            pass
+        release.set()
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {"calls": 1, "shared": 3, "in_flight": 0}
+
+
+def test_error_is_shared_and_next_call_runs_again():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "k", failing)
+        assert started.wait(5)
+        follower = pool.submit(flight.do, "k", failing)
+        while flight._calls["k"].waiters < 1:
+            pass
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result(5)
+
+    assert flight.do("k", lambda: "fresh") == "fresh"
+    assert flight.stats()["calls"] == 2
@@ -0,0 +1,96 @@
+import types
+
+import numpy as np
+
+from core import suggestion_cache
+from core.suggestion_cache import SuggestionCache, normalize_theme
+
+VECTORS = {
+    "고래": [1.0, 0.0, 0.0],
+    "고래 노래": [0.95, 0.31, 0.0],     # 고래와 유사도 약 0.95
+    "고래 뼈": [0.6, 0.8, 0.0],         # 유사도 0.6
+    "별": [0.0, 1.0, 0.0],
+    "달": [0.0, 0.0, 1.0],
+}
+
+
+class FakeEmbed:
+    def __init__(self, vectors=VECTORS):
+        self.vectors = vectors
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return self.vectors[text]
+
+
+def make_cache(tmp_path, **kwargs):
+    return SuggestionCache(FakeEmbed(), path=tmp_path / "index.npz", **kwargs)
+
+
+def test_normalize_theme():
+    assert normalize_theme("  고래의   꿈!! ") == "고래의 꿈"
+    assert normalize_theme("Whale, Song.") == "whale song"
+
+
+def test_exact_hit_skips_embedding(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("고래", {"style": "수채화 스타일"})
+    cache.embed.calls.clear()
+    assert cache.lookup("  고래!! ") == {"style": "수채화 스타일"}
+    assert cache.embed.calls == []
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_semantic_hit_only_above_threshold(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.9)
+    cache.store("고래", "whale")
+    assert cache.lookup("고래 노래") == "whale"
+    assert cache.lookup("고래 뼈") is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["lookups"]) == (1, 2)
+
+
+def test_reuses_least_recently_used_row_at_max_entries(tmp_path, monkeypatch):
+    now = iter(range(1, 100))
+    monkeypatch.setattr(suggestion_cache, "time", types.SimpleNamespace(
+        time=lambda: float(next(now)), perf_counter=suggestion_cache.time.perf_counter))
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.store("고래", "whale")
+    cache.store("별", "star")
+    cache.lookup("고래")                 # 고래를 최근 사용으로
+    cache.store("달", "moon")            # 한도 → 별 자리를 재사용
+    assert cache.stats()["entries"] == 2
+    assert cache._vectors.shape == (2, 3)
+    assert cache.lookup("별") is None
+    assert cache.lookup("고래") == "whale"
+    assert cache.lookup("달") == "moon"
+
+
+def test_dimension_change_drops_old_index(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("고래", "whale")
+    cache.store("별", "star")
+    cache.embed = FakeEmbed({"달": [0.0, 0.0, 0.0, 1.0]})
+    cache.store("달", "moon")
+    assert cache.stats()["entries"] == 1
+    assert cache._vectors.shape == (1, 4)
+    assert cache.lookup("고래") is None
+    assert cache.lookup("달") == "moon"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("고래", {"mood": ["희망"]})
+    cache.store("별", "star")
+    cache.save()
+    loaded = make_cache(tmp_path)
+    assert loaded.stats()["entries"] == 2
+    np.testing.assert_allclose(loaded._vectors, cache._vectors)
+    assert loaded.lookup("고래") == {"mood": ["희망"]}
+    assert loaded.lookup("고래 노래") == {"mood": ["희망"]}
+
+
+def test_corrupt_index_starts_empty(tmp_path):
+    (tmp_path / "index.npz").write_bytes(b"not an npz")
+    assert make_cache(tmp_path).stats()["entries"] == 0
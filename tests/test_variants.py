@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from core import variants
+from core.jobs import Job
+from core.options import OPTIONS
+from core.variants import plan_variants, variants_job
+
+SELECTION = {"style": "수채화 스타일", "tone": "차가운 블루", "mood": ["고요함"], "viewpoint": "정면"}
+
+
+def test_same_settings_share_one_prompt_with_distinct_variants():
+    plan = plan_variants(SELECTION, 3, "none", lambda selection: "p")
+    assert [item["prompt"] for item in plan] == ["p"] * 3
+    assert [item["variant"] for item in plan] == [0, 1, 2]
+
+
+def test_tone_variants_start_from_current_tone():
+    plan = plan_variants(SELECTION, 2, "tone")
+    assert plan[0]["selection"]["tone"] == "차가운 블루"
+    assert plan[1]["selection"]["tone"] != "차가운 블루"
+    assert all(item["prompt"] is None for item in plan)
+
+
+def test_viewpoint_variants_wrap_to_the_start_of_the_list():
+    viewpoints = list(OPTIONS["viewpoint"])
+    start = viewpoints.index("역광")
+    plan = plan_variants(dict(SELECTION, viewpoint="역광"), 8, "viewpoint")
+    assert [item["label"] for item in plan] == viewpoints[start:] + viewpoints[:start]
+    # 값이 겹치지 않으면 번호는 모두 0 (한 장 생성 때 만든 캐시를 그대로 씀)
+    assert [item["variant"] for item in plan] == [0] * 8
+
+
+def test_variant_counter_goes_up_once_values_repeat(monkeypatch):
+    monkeypatch.setattr(variants, "OPTIONS", {"viewpoint": ("가", "나", "다")})
+    plan = plan_variants(dict(SELECTION, viewpoint="나"), 5, "viewpoint")
+    assert [(item["label"], item["variant"]) for item in plan] == [
+        ("나", 0), ("다", 0), ("가", 0), ("나", 1), ("다", 1),
+    ]
+
+
+def test_job_builds_each_prompt_from_its_own_selection():
+    plan = plan_variants(SELECTION, 3, "tone")
+    lock = threading.Lock()
+    generated = []
+
+    def generate_ref(prompt, size, variant=0):
+        with lock:
+            generated.append(prompt)
+        return f"ref:{prompt}"
+
+    cells = variants_job(Job("j", ""), plan, "1024x1024", generate_ref,
+                         make_prompt=lambda selection: f"tone={selection['tone']}")
+    assert [item["prompt"] for item in plan] == [f"tone={item['selection']['tone']}" for item in plan]
+    assert sorted(generated) == sorted(item["prompt"] for item in plan)
+    assert [cell["ref"] for cell in cells] == [f"ref:{item['prompt']}" for item in plan]
+
+
+def test_job_fails_only_when_every_cell_failed():
+    plan = plan_variants(SELECTION, 2, "none", lambda selection: "p")
+
+    def flaky(prompt, size, variant=0):
+        if variant == 0:
+            raise RuntimeError("boom")
+        return "ref"
+
+    cells = variants_job(Job("j", ""), plan, "s", flaky)
+    assert cells == [{"error": "boom"}, {"ref": "ref"}]
+
+    with pytest.raises(RuntimeError):
+        variants_job(Job("j", ""), plan, "s", lambda *args, **kwargs: 1 / 0)